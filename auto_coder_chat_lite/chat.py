@@ -1,5 +1,4 @@
 import copy
-import glob
 import json
 import os
 import platform
@@ -7,9 +6,10 @@ import traceback
 import argparse
 import git
 import re
-from jinja2 import Environment, FileSystemLoader
+import threading
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
-from typing import List
+from typing import List, Tuple
 from prompt_toolkit import PromptSession, prompt
 from prompt_toolkit.history import InMemoryHistory
 from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
@@ -22,16 +22,25 @@ from rich.spinner import Spinner
 from rich.live import Live
 from rich.panel import Panel
 from rich.syntax import Syntax
-from pathspec import PathSpec
-from pathspec.patterns import GitWildMatchPattern
 import shutil
 
-from auto_coder_chat_lite.lib.agent import external_chat_completion
+from auto_coder_chat_lite.lib.agent import external_chat_completion, prewarm_client
 from auto_coder_chat_lite.common import AutoCoderArgs
-from auto_coder_chat_lite.common.code_auto_merge_editblock import CodeAutoMergeEditBlock
+from auto_coder_chat_lite.common.code_auto_merge_editblock import CodeAutoMergeEditBlock, EditBlockStream
 from auto_coder_chat_lite.common.git_diff_extractor import GitDiffExtractor
 from auto_coder_chat_lite.lang import get_text
 from auto_coder_chat_lite.common.config_manager import ConfigManager
+from auto_coder_chat_lite.common.file_watcher import FileWatcher
+from auto_coder_chat_lite.common.file_tree import render_file_tree
+from auto_coder_chat_lite.common.pattern_resolver import resolve_mentions, resolve_patterns
+from auto_coder_chat_lite.common.file_cache import file_cache
+from auto_coder_chat_lite.common.file_reader import describe_oversized
+from auto_coder_chat_lite.common.token_budget import ContextBudget, truncate_text
+from auto_coder_chat_lite.common.prompt_cache import PromptCacheLayout
+from auto_coder_chat_lite.common.symbol_context import extract_relevant, query_identifiers
+from auto_coder_chat_lite.common.conversation import Conversation
+from auto_coder_chat_lite.common.stream_buffer import StreamBuffer, Throttle
+from auto_coder_chat_lite.common.response_cache import ResponseCache
 from auto_coder_chat_lite.constants import (
     HUMAN_AS_MODEL,
     MERGE_CONFIRM,
@@ -48,6 +57,7 @@ from auto_coder_chat_lite.constants import (
     COMMAND_EXIT,
     COMMAND_MERGE,
     COMMAND_CD,
+    COMMAND_NEW,
     MERGE_TYPE_SEARCH_REPLACE,
     MERGE_TYPE_GIT_DIFF,
     MERGE_TYPE_HYLANG,
@@ -59,10 +69,20 @@ from auto_coder_chat_lite.constants import (
     EDITBLOCK_SIMILARITY, 
     MERGE_TYPE, 
     MERGE_CONFIRM, 
-    HUMAN_AS_MODEL
+    HUMAN_AS_MODEL,
+    FILE_WATCHER,
+    FILE_TREE_BUDGET,
+    DEFAULT_FILE_TREE_BUDGET,
+    CONTEXT_TOKEN_LIMIT,
+    PROMPT_LAYOUT,
+    PROMPT_LAYOUT_CACHE,
+    CONTEXT_MODE,
+    CONTEXT_MODE_SYMBOLS,
+    MULTI_TURN,
+    RESPONSE_CACHE
 )
 from auto_coder_chat_lite.lib.logger import setup_logger
-from auto_coder_chat_lite.project import init_project
+from auto_coder_chat_lite.project import init_project, get_project_index
 from auto_coder_chat_lite.configuration_handler import handle_configuration
 from auto_coder_chat_lite.lib.merge import parse_and_eval_hylang
 
@@ -88,90 +108,41 @@ commands = [
     COMMAND_COMMIT_MESSAGE,
     COMMAND_MERGE,
     COMMAND_CD,  # 新增 /cd 命令
+    COMMAND_NEW,
 ]
 
 VERBOSE = False
 
-def get_exclude_spec(root_dir: str = None):
-    # 读取 .gitignore 文件
-    gitignore_path = os.path.join(root_dir or PROJECT_ROOT, '.gitignore')
-    if os.path.exists(gitignore_path):
-        with open(gitignore_path, 'r', encoding='utf-8') as f:
-            gitignore_content = f.read()
-        spec = PathSpec.from_lines(GitWildMatchPattern, gitignore_content.splitlines())
-    else:
-        spec = PathSpec(patterns=[])
-    
-    # 获取排除目录
-    final_exclude_dirs = defaut_exclude_dirs + memory.get("exclude_dirs", [])
-    
-    return spec, final_exclude_dirs
-
-
-
-def generate_file_tree(root_dir, indent_char='    ', last_char='', level_char=''):
-    file_tree = []
-    spec, final_exclude_dirs = get_exclude_spec(root_dir)
-
-    def list_files(start_path, prefix=''):
-        files = sorted(os.listdir(start_path))
-        for i, file_name in enumerate(files):
-            full_path = os.path.join(start_path, file_name)
-            if os.path.isdir(full_path):
-                full_path = f"{full_path}/"
-            if spec.match_file(full_path) or any(exclude_dir in full_path for exclude_dir in final_exclude_dirs):
-                continue
-            is_last = i == len(files) - 1
-            new_prefix = prefix + indent_char
-
-            if os.path.isdir(full_path):
-                file_tree.append(f"{new_prefix}{file_name}/")
-                list_files(full_path, new_prefix)
-            else:
-                file_tree.append(f"{new_prefix}{file_name}")
+def generate_file_tree(root_dir, indent_char='    ', last_char='', level_char='', budget=None, keep_paths=(), index=None):
+    """
+    Render the project tree under root_dir, see render_file_tree.
 
-    file_tree.append(f"{root_dir}/")
-    list_files(root_dir)
-    return "\n".join(file_tree)
+    :param root_dir: The directory to render.
+    :param budget: The maximum number of tokens of the tree, None or 0 for no limit.
+    :param keep_paths: Files whose parent directories are always expanded.
+    :param index: The already refreshed index of root_dir, refreshed here if omitted.
+    :return: The rendered tree.
+    """
+    return render_file_tree(index or get_project_index(root_dir), root_dir, budget, keep_paths, indent_char)
 
-def find_files_in_project(patterns: List[str]) -> List[str]:
-    matched_files = []
-    spec, final_exclude_dirs = get_exclude_spec()
-
-    for pattern in patterns:
-        if "*" in pattern or "?" in pattern:
-            for file_path in glob.glob(pattern, recursive=True):
-                if os.path.isfile(file_path):
-                    abs_path = os.path.abspath(file_path)
-                    if not spec.match_file(abs_path) and not any(
-                        exclude_dir in abs_path.split(os.sep)
-                        for exclude_dir in final_exclude_dirs
-                    ):
-                        matched_files.append(abs_path)
-        else:
-            is_added = False
-            ## add files belongs to project
-            for root, dirs, files in os.walk(PROJECT_ROOT):
-                dirs[:] = [d for d in dirs if d not in final_exclude_dirs]
-                if pattern in files:
-                    matched_files.append(os.path.join(root, pattern))
-                    is_added = True
-                else:
-                    for file in files:
-                        _pattern = os.path.abspath(pattern)
-                        if _pattern in os.path.join(root, file):
-                            matched_files.append(os.path.join(root, file))
-                            is_added = True
-            ## add files not belongs to project
-            if not is_added:
-                matched_files.append(pattern)
+def find_files_in_project(patterns: List[str], index=None) -> List[str]:
+    """
+    Resolve file names, paths and glob patterns to files, in one pass over the project index.
 
-    return list(set(matched_files))
+    :param patterns: The patterns of one command.
+    :param index: The already refreshed project index, refreshed here if omitted.
+    :return: The matched file paths, plus the plain patterns that matched nothing.
+    """
+    return resolve_patterns(index or get_project_index(), patterns)
 
 from auto_coder_chat_lite.command_completer import CommandCompleter
         # self.symbol_list = get_symbol_list()
 
 completer = CommandCompleter(commands)
+prompt_layout = PromptCacheLayout()
+conversation = Conversation()
+file_watcher = None
+file_watcher_lock = threading.Lock()
 
 def save_memory():
     project_dir = os.path.join(CURRENT_ROOT, PROJECT_DIR_NAME)
@@ -198,12 +169,46 @@ def load_memory():
         with open(memory_file, "w", encoding='utf-8') as f:
             json.dump({"current_files": {"files": []}, "conf": {}}, f, indent=2, ensure_ascii=False)
     
-    global memory
+    # Update the shared memory dict in place so modules that imported it
+    # (e.g. project.py) see the loaded exclude_dirs and conf.
     config_manager = ConfigManager(memory_file)
-    memory = config_manager.load(lambda: copy.deepcopy(_memory))
+    loaded_memory = config_manager.load(lambda: copy.deepcopy(_memory))
+    memory.clear()
+    memory.update(loaded_memory)
     if MERGE_TYPE not in memory["conf"]:
         memory["conf"][MERGE_TYPE] = MERGE_TYPE_SEARCH_REPLACE
     completer.update_current_files(memory["current_files"]["files"])
+    # The texts the diffs are computed against only live in this session.
+    conversation.start(memory.setdefault("conversation", []))
+    sync_file_watcher()
+
+def sync_file_watcher():
+    """
+    Start or stop the file watcher according to the file_watcher configuration.
+
+    While it runs, files created, deleted or renamed on disk are applied to the
+    completer and the file index without rescanning the project. The watcher is
+    started once the completer has loaded the project files, so enabling it
+    never delays the prompt.
+    """
+    global file_watcher
+    enabled = memory["conf"].get(FILE_WATCHER, False)
+    if enabled and file_watcher is None:
+        completer.when_ready(start_file_watcher)
+    elif not enabled:
+        with file_watcher_lock:
+            if file_watcher is not None:
+                file_watcher.stop()
+                file_watcher = None
+
+def start_file_watcher():
+    global file_watcher
+    with file_watcher_lock:
+        if file_watcher is not None or not memory["conf"].get(FILE_WATCHER, False):
+            return
+        file_watcher = FileWatcher(get_project_index(), completer.apply_changes)
+        file_watcher.start()
+        logger.info(f"File watcher started using {file_watcher.backend}")
 
 def get_files_to_add(args: List[str]):
     """
@@ -213,25 +218,28 @@ def get_files_to_add(args: List[str]):
     :return: A list of file paths that are to be added.
     """
     existing_files = memory["current_files"]["files"]
+    index = get_project_index()
     matched_files = []
+    patterns = []
     
     for arg in args:
         if os.path.isabs(arg):  # 如果是绝对路径
             if os.path.exists(arg):  # 检查文件是否存在
                 matched_files.append(arg)
         else:
-            matched_files.extend(find_files_in_project([arg]))
+            patterns.append(arg)
+    if patterns:
+        matched_files.extend(find_files_in_project(patterns, index))
     
-    spec, final_exclude_dirs = get_exclude_spec()
+    matcher = index.matcher
     files_to_add = []
     for f in matched_files:
         if f not in existing_files:
             logger.info(f"File {f} not in existing files.")
-        if not spec.match_file(f):
-            logger.info(f"File {f} does not match spec.")
-        if not any(exclude_dir in f for exclude_dir in final_exclude_dirs):
-            logger.info(f"File {f} does not contain any exclude directories.")
-        if f not in existing_files and not spec.match_file(f) and not any(exclude_dir in f for exclude_dir in final_exclude_dirs):
+        is_excluded = matcher.is_excluded(f)
+        if not is_excluded:
+            logger.info(f"File {f} is not excluded by .gitignore or exclude directories.")
+        if f not in existing_files and not is_excluded:
             files_to_add.append(f)
     return files_to_add
 
@@ -256,13 +264,11 @@ def remove_files(file_names: List[str]):
         for file in removed_files:
             memory["current_files"]["files"].remove(file)
     else:
-        removed_files = []
-        for pattern in file_names:
-            matched_files = find_files_in_project([pattern])
-            for file in matched_files:
-                if file in memory["current_files"]["files"]:
-                    removed_files.append(file)
-                    memory["current_files"]["files"].remove(file)
+        matched_files = set(find_files_in_project(file_names))
+        removed_files = [file for file in memory["current_files"]["files"] if file in matched_files]
+        memory["current_files"]["files"] = [
+            file for file in memory["current_files"]["files"] if file not in matched_files
+        ]
     if removed_files:
         print(get_text('files_removed').format(removed_files))
     else:
@@ -275,26 +281,79 @@ def list_files():
     if current_files:
         table = Table(title="Current Files")
         table.add_column("File", style="cyan")
-        for file in current_files:
+        # Flag the files that would not be sent in full before a request is wasted on them.
+        notes = [describe_oversized(file) for file in current_files]
+        show_notes = any(notes)
+        if show_notes:
+            table.add_column("Note", style="yellow")
+        for file, note in zip(current_files, notes):
             relative_path = os.path.relpath(file, PROJECT_ROOT)
-            table.add_row(relative_path)
+            row = [relative_path, note or ""] if show_notes else [relative_path]
+            table.add_row(*row)
         console = Console()
         console.print(table)
     else:
         print(get_text('no_files'))
 
-def render_template(template_name, **kwargs):
+template_environments = {}
+# Where the compiled bytecode of the templates is cached across sessions.
+JINJA_CACHE_DIR = os.path.join(PROJECT_ROOT, PROJECT_DIR_NAME, "jinja_cache")
+
+def get_template_environment(template_path):
+    """
+    Return the shared Jinja environment of a template directory.
+
+    The environment keeps compiled templates in memory and re-checks the mtime
+    of a template before reusing it, so edited templates are picked up. The
+    compiled bytecode is also cached in JINJA_CACHE_DIR, so a new session
+    does not compile unchanged templates again.
+
+    :param template_path: The template directory.
+    :return: The Environment.
+    """
+    env = template_environments.get(template_path)
+    if env is None:
+        os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+        env = template_environments[template_path] = Environment(
+            loader=FileSystemLoader(template_path),
+            bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR),
+            auto_reload=True,
+        )
+    return env
+
+def get_template(template_name):
     project_dir = os.path.join(PROJECT_ROOT, PROJECT_DIR_NAME)
     template_path_project = os.path.join(project_dir, "template")
     template_path_current = os.path.join(os.path.dirname(os.path.abspath(__file__)), "template")
 
     if os.path.exists(os.path.join(template_path_project, template_name)):
-        env = Environment(loader=FileSystemLoader(template_path_project))
+        env = get_template_environment(template_path_project)
     else:
-        env = Environment(loader=FileSystemLoader(template_path_current))
+        env = get_template_environment(template_path_current)
 
-    template = env.get_template(template_name)
-    return template.render(**kwargs)
+    return env.get_template(template_name)
+
+def render_template(template_name, **kwargs):
+    return get_template(template_name).render(**kwargs)
+
+def render_template_to_file(template_name, file_path, **kwargs):
+    """
+    Render a template chunk by chunk straight into a file, without building
+    the whole text in memory.
+
+    :param template_name: The template to render.
+    :param file_path: The file to write, e.g. output.txt.
+    :param kwargs: The template variables.
+    """
+    with open(file_path, "w", encoding='utf-8') as output_file:
+        output_file.writelines(get_template(template_name).generate(**kwargs))
+
+def read_rendered(file_path):
+    """
+    Read back a prompt written by render_template_to_file, when a string copy is really needed.
+    """
+    with open(file_path, encoding='utf-8') as f:
+        return f.read()
 
 def get_user_input():
     """
@@ -320,17 +379,18 @@ def get_user_input():
         lines.append(line)
     return "\n".join(lines)
 
-def merge_code_with_editblock(result: str):
+def merge_code_with_editblock(result: str, merger: CodeAutoMergeEditBlock = None):
     """
     Merge the provided code result using the configured merge type.
     
     :param result: The code result to be merged.
+    :param merger: The search/replace merger the result was already checked with while streaming.
     """
     if VERBOSE:
         logger.info(result)
     merge_type = memory["conf"].get(MERGE_TYPE, MERGE_TYPE_SEARCH_REPLACE)
     if merge_type == MERGE_TYPE_SEARCH_REPLACE:
-        merge_code_search_replace(result)
+        merge_code_search_replace(result, merger)
     if merge_type == MERGE_TYPE_GIT_DIFF:
         git_diff_extractor = GitDiffExtractor(PROJECT_ROOT)
         diff_blocks = git_diff_extractor.extract_git_diff(result)
@@ -341,17 +401,31 @@ def merge_code_with_editblock(result: str):
     if merge_type == MERGE_TYPE_HYLANG:
         parse_and_eval_hylang(result)
 
-def merge_code_search_replace(result: str):
-    confirm = memory["conf"].get(MERGE_CONFIRM, False)
+def create_editblock_merger() -> CodeAutoMergeEditBlock:
     editblock_similarity = memory["conf"].get("editblock_similarity", 0.8)
     args = AutoCoderArgs(file="output.txt", source_dir=PROJECT_ROOT, editblock_similarity=editblock_similarity)
-    code_auto_merge_editblock = CodeAutoMergeEditBlock(args)
+    return CodeAutoMergeEditBlock(args)
+
+def merge_code_search_replace(result: str, merger: CodeAutoMergeEditBlock = None):
+    confirm = memory["conf"].get(MERGE_CONFIRM, False)
+    code_auto_merge_editblock = merger or create_editblock_merger()
     code_auto_merge_editblock.merge_code(result, confirm=confirm)
 
-def read_file(file_path):
-    with open(file_path, encoding='utf-8') as f:
-        file_code = f.read()
-    
+def read_context_files(file_paths: List[str]) -> List[Tuple[str, str]]:
+    """
+    Read the context files of a prompt concurrently, within the per-file and total size caps.
+
+    :param file_paths: The files to read, in prompt order.
+    :return: The (file_path, file_code) of every file, in the same order.
+    """
+    result = file_cache.read_many(file_paths)
+    if len(file_paths) > 1:
+        saved = max(result.read_time - result.wall_time, 0)
+        print(f"Loaded {len(file_paths)} context files in {result.wall_time:.3f}s "
+              f"(serial reads: {result.read_time:.3f}s, saved {saved:.3f}s)")
+    return result.contents
+
+def fence_code(file_path, file_code):
     # 已知文件类型列表
     known_file_types = {
         '.py': 'python',
@@ -372,27 +446,68 @@ def read_file(file_path):
     file_type = known_file_types.get(file_extension, 'plaintext')
     
     return f"```{file_type}\n{file_code}\n```"
-    
+
+def format_files_code(contents: List[Tuple[str, str]]) -> str:
+    return "\n".join(f"##File: {file_path}\n{fence_code(file_path, file_code)}" for file_path, file_code in contents)
+
+def format_diffs(diffs: List[Tuple[str, str]]) -> str:
+    return "\n".join(f"##File: {file_path}\n```diff\n{diff}```" for file_path, diff in diffs)
+
+def get_response_cache():
+    """
+    Return the cache of LLM responses of the project, or None if the response_cache configuration is off.
+    """
+    if not memory["conf"].get(RESPONSE_CACHE, False):
+        return None
+    return ResponseCache(os.path.join(CURRENT_ROOT, PROJECT_DIR_NAME, "response_cache"))
+
+def print_token_breakdown(budget: ContextBudget):
+    table = Table(title="Prompt Tokens")
+    table.add_column("Section", style="cyan")
+    table.add_column("Tokens", justify="right")
+    table.add_column("Note", style="yellow")
+    for name, tokens, note in budget.breakdown():
+        table.add_row(name, f"{tokens:,}", note)
+    limit = f" / {budget.limit:,}" if budget.limit else ""
+    over = budget.limit and budget.total > budget.limit
+    table.add_row("total", f"{budget.total:,}{limit}", "over the limit" if over else "")
+    Console().print(table)
+
 def coding(query: str):
     """
     Process the coding query and generate or prompt for code based on the provided context.
 
     :param query: The user's coding query.
     """
-    files = generate_file_tree(CURRENT_ROOT)
-    files_code = "\n".join(
-        [f"##File: {file}\n{read_file(file)}" for file in memory['current_files']['files'] if os.path.exists(file)]
-    )
+    files = ""
+    # The index is refreshed once per request, and shared by the tree, its
+    # re-renders while fitting the budget and the @mentions.
+    tree_index = None
+    if memory["conf"].get(SHOW_FILE_TREE, True):
+        tree_index = get_project_index(CURRENT_ROOT)
+        files = generate_file_tree(
+            CURRENT_ROOT,
+            budget=memory["conf"].get(FILE_TREE_BUDGET, DEFAULT_FILE_TREE_BUDGET),
+            keep_paths=memory["current_files"]["files"],
+            index=tree_index,
+        )
+    context_files = [file for file in memory['current_files']['files'] if os.path.exists(file)]
 
     # Check if the query contains "@abc.fg" pattern
     file_pattern = re.compile(r'@(\w+\.\w+)')
     file_matches = file_pattern.findall(query)
 
-    for file_match in file_matches:
-        matched_files = get_files_to_add([file_match])
-        for file_path in matched_files:
-            if file_path not in memory['current_files']['files']:
-                files_code += f"\n##File: {file_path}\n{read_file(file_path)}"
+    mentioned_files = []
+    if file_matches:
+        project_index = tree_index if tree_index is not None and tree_index.root_dir == PROJECT_ROOT else get_project_index()
+        mentions = resolve_mentions(project_index, file_matches)
+        for name, paths in mentions.ambiguous.items():
+            relative = ", ".join(os.path.relpath(path, PROJECT_ROOT) for path in paths)
+            print(f"@{name} is ambiguous, all {len(paths)} matches are included: {relative}")
+        for name in mentions.missing:
+            print(f"@{name} matches no file in the project")
+        mentioned_files = [file_path for file_path in mentions.files
+                           if file_path not in memory['current_files']['files']]
 
     try:
         import pyperclip
@@ -400,42 +515,123 @@ def coding(query: str):
         query = query.format(clip=clipboard_content) if "{clip}" in query else query
     except ImportError:
         print(get_text('pyperclip_not_installed'))
-    replaced_template = render_template("code.txt", files=files, project_root=CURRENT_ROOT, files_code=files_code, query=query, **memory['conf'])
 
-    with open("output.txt", "w", encoding='utf-8') as output_file:
-        output_file.write(replaced_template)
+    # Account for every part of the prompt and, over the configured limit,
+    # shrink the file tree first, then mentioned files, then current files.
+    budget = ContextBudget(memory["conf"].get(CONTEXT_TOKEN_LIMIT, 0))
+    shrink_code = lambda text, tokens: truncate_text(text, tokens, budget.count_tokens)
+    template = render_template("code.txt", files="", project_root=CURRENT_ROOT, files_code="", query="", **memory['conf'])
+    budget.add("template", template, priority=3)
+    tree_section = budget.add("file tree", files, priority=0, shrink=lambda text, tokens: generate_file_tree(
+        CURRENT_ROOT, budget=tokens, keep_paths=memory["current_files"]["files"], index=tree_index) if tokens > 0 else "")
+    file_sections = []
+    # In symbols mode only the definitions the query names are sent whole,
+    # the rest of each file is reduced to signatures.
+    wanted = query_identifiers(query) if memory["conf"].get(CONTEXT_MODE) == CONTEXT_MODE_SYMBOLS else None
+    for file_path, file_code in read_context_files(context_files + mentioned_files):
+        if wanted is not None:
+            file_code = extract_relevant(file_path, file_code, wanted)
+        priority = 2 if file_path in context_files else 1
+        name = os.path.relpath(file_path, PROJECT_ROOT)
+        file_sections.append((file_path, budget.add(name, file_code, priority=priority, shrink=shrink_code)))
+    budget.add("query", query, priority=3)
+    budget.fit()
+    print_token_breakdown(budget)
+
+    files = tree_section.text
+    contents = [(file_path, section.text) for file_path, section in file_sections if section.text]
+    multi_turn = memory["conf"].get(MULTI_TURN, False)
+    turn_contents = contents if multi_turn else None
+    if multi_turn and conversation.active:
+        # The model already has the files of the previous turns, so a
+        # follow-up only sends new files and diffs of the changed ones.
+        delta = conversation.delta(contents)
+        removed_files = [os.path.relpath(file_path, PROJECT_ROOT) for file_path in delta.removed]
+        render_template_to_file("code_followup.txt", "output.txt", files_code=format_files_code(delta.added),
+                                changed_files_code=format_diffs(delta.changed), removed_files=removed_files,
+                                query=query)
+        print(f"Follow-up turn {len(conversation.turns) + 1}: {len(delta.changed)} changed files sent as diffs, "
+              f"{len(delta.added)} sent in full, {len(delta.unchanged)} unchanged files omitted")
+        del files, contents, delta, file_sections, tree_section, budget
+    else:
+        if memory["conf"].get(PROMPT_LAYOUT) == PROMPT_LAYOUT_CACHE:
+            # Unchanged files first, in a stable order, so consecutive prompts
+            # share the longest possible prefix for provider-side caching.
+            contents, changed_contents = prompt_layout.split_files(contents)
+        else:
+            changed_contents = []
+        files_code = format_files_code(contents)
+        changed_files_code = format_files_code(changed_contents)
+        render_template_to_file("code.txt", "output.txt", files=files, project_root=CURRENT_ROOT, files_code=files_code,
+                                changed_files_code=changed_files_code, query=query, **memory['conf'])
+        # The prompt now lives in output.txt; drop the parts so at most one copy
+        # of it is held in memory below.
+        del files, files_code, changed_files_code, contents, changed_contents, file_sections, tree_section, budget
+        shared, total = prompt_layout.measure("output.txt")
+        if total:
+            print(f"Reusable prompt prefix: {shared / total:.0%} ({shared:,} of {total:,} characters shared with the previous prompt)")
 
     if not memory["conf"].get("human_as_model", True):
+        history = conversation.messages if multi_turn else []
         messages = [
             {"role": "system", "content": "You are a helpful assistant that generates code based on the provided context and query."},
-            {"role": "user", "content": replaced_template}
+            *history,
+            {"role": "user", "content": read_rendered("output.txt")}
         ]
         spinner = Spinner("dots", text="[cyan]Generating code...")
         result = ""
 
         terminal_height = shutil.get_terminal_size()[1]
 
-        with Live(spinner, refresh_per_second=4) as live:
-            response = external_chat_completion(messages, stream=True)
+        refresh_per_second = 4
+        with Live(spinner, refresh_per_second=refresh_per_second) as live:
+            response = external_chat_completion(messages, stream=True, cache=get_response_cache())
             if response:
-                result = ""
-                output = []
-                for chunk in response:
-                    if chunk.choices and chunk.choices[0].delta.content:
-                        result += chunk.choices[0].delta.content
-                        output = result.splitlines()
-                        # Trim output_text to fit within terminal height
-                        if len(output) > terminal_height - 4:
-                            output_text = "\n".join(output[-terminal_height + 4:])
-                        else:
-                            output_text = result
-                        live.update(
-                            Panel(
-                                Syntax(output_text, "markdown", theme="monokai"),
-                                title="Generating Code",
-                                border_style="green",
-                            )
+                # Keep only the lines that fit within the terminal height for
+                # display, and rebuild the panel at most once per refresh.
+                buffer = StreamBuffer(terminal_height - 4)
+                throttle = Throttle(refresh_per_second)
+                # Search/replace blocks are checked against their files as
+                # they arrive; once one cannot be merged, the whole answer
+                # would be rejected, so the rest of it is not waited for.
+                merger = None
+                edit_blocks = None
+                if memory["conf"].get(MERGE_TYPE, MERGE_TYPE_SEARCH_REPLACE) == MERGE_TYPE_SEARCH_REPLACE:
+                    merger = create_editblock_merger()
+                    edit_blocks = EditBlockStream(merger)
+
+                def show():
+                    live.update(
+                        Panel(
+                            Syntax(buffer.tail(), "markdown", theme="monokai"),
+                            title="Generating Code",
+                            border_style="green",
                         )
+                    )
+
+                try:
+                    for chunk in response:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            buffer.append(chunk.choices[0].delta.content)
+                            if edit_blocks is not None:
+                                edit_blocks.feed(chunk.choices[0].delta.content)
+                                if edit_blocks.unmatched:
+                                    response.close()
+                                    print(f"A search block does not match {edit_blocks.unmatched[0][0]}, "
+                                          f"generation stopped after {buffer.line_count:,} lines.")
+                                    break
+                            if throttle.ready():
+                                show()
+                except Exception as e:
+                    # The stream failed after its first chunk, which cannot be retried.
+                    print(f"OpenAI API call failed: {e}")
+                    if edit_blocks is not None:
+                        edit_blocks.close()
+                    return
+                show()
+                result = buffer.text()
+                if edit_blocks is not None:
+                    edit_blocks.close()
             else:
                 logger.error("Failed to generate code.")
                 return
@@ -443,15 +639,18 @@ def coding(query: str):
 
         try:
             import pyperclip
-            pyperclip.copy(replaced_template)
+            pyperclip.copy(read_rendered("output.txt"))
         except ImportError:
             print(get_text('pyperclip_not_installed'))
 
         print(get_text('coding_processed'))
 
         result = get_user_input()
+        merger = None
 
-    merge_code_with_editblock(result)
+    if multi_turn and result:
+        conversation.record(query, turn_contents, read_rendered("output.txt"), result)
+    merge_code_with_editblock(result, merger)
 
 def merge_code():
     print(get_text('merge_started'))
@@ -471,7 +670,7 @@ def exclude_dirs(dir_names: List[str]):
     else:
         print(get_text('no_dirs_added'))
     save_memory()
-    completer.refresh_files()
+    completer.refresh_files(background=True)
 
 def show_help():
     print(get_text('help_message'))
@@ -482,6 +681,7 @@ def show_help():
     print(get_text('commit_message_help'))
     print(get_text('cd_help'))  # 新增 /cd 命令的帮助信息
     print(get_text('merge_help'))
+    print(get_text('new_help'))
     print(get_text('exit_help'))
 
 def get_git_diff():
@@ -521,25 +721,22 @@ def get_language():
     return language_map.get(language_code, "English")
     
 def commit_message(ref_id=None):
-    replaced_template = render_template("commit_message.txt", git_diff=get_git_diff(), language=get_language(), ref_id=ref_id)
-
-    with open("output.txt", "w", encoding='utf-8') as output_file:
-        output_file.write(replaced_template)
+    git_diff = get_git_diff()
+    render_template_to_file("commit_message.txt", "output.txt", git_diff=git_diff, language=get_language(), ref_id=ref_id)
 
     if memory["conf"].get(HUMAN_AS_MODEL, True) == False:
-        git_diff = get_git_diff()
         if not git_diff:
             print("No changes to commit.")
             return
 
         messages = [
             {"role": "system", "content": "You are a helpful assistant that generates git commit messages."},
-            {"role": "user", "content": replaced_template}
+            {"role": "user", "content": read_rendered("output.txt")}
         ]
 
         spinner = Spinner("dots", text="[cyan]Generating commit message...")
         with Live(spinner, refresh_per_second=10):
-            response = external_chat_completion(messages)
+            response = external_chat_completion(messages, cache=get_response_cache())
         if response:
             commit_message = response.choices[0].message.content.strip()
             # Remove triple backticks if present
@@ -563,7 +760,7 @@ def commit_message(ref_id=None):
     else:
         try:
             import pyperclip
-            pyperclip.copy(replaced_template)
+            pyperclip.copy(read_rendered("output.txt"))
             print(get_text('commit_message_generated'))
         except ImportError:
             print(get_text('pyperclip_not_installed'))
@@ -573,6 +770,11 @@ def commit_message(ref_id=None):
 def main():
     init_project()
     load_memory()
+    # Load the project files for completion while the prompt is already up.
+    completer.refresh_files(background=True)
+    # Open the model connection while the user types the first request.
+    if not memory["conf"].get(HUMAN_AS_MODEL, True):
+        prewarm_client()
 
     kb = KeyBindings()
 
@@ -585,6 +787,8 @@ def main():
         new_status = not current_status
         memory["conf"][HUMAN_AS_MODEL] = new_status
         save_memory()
+        if not new_status:
+            prewarm_client()
         event.app.invalidate()
 
     def get_bottom_toolbar():
@@ -649,6 +853,7 @@ def main():
                 exclude_dirs(dir_names)
             elif user_input.startswith(COMMAND_CONF):
                 handle_configuration(user_input, memory, save_memory)
+                sync_file_watcher()
             elif user_input.startswith(COMMAND_COMMIT_MESSAGE):
                 ref_id = None
                 if ' ' in user_input:
@@ -660,6 +865,10 @@ def main():
                 raise EOFError()
             elif user_input.startswith(COMMAND_MERGE):
                 merge_code()
+            elif user_input.startswith(COMMAND_NEW):
+                conversation.start(memory["conversation"])
+                save_memory()
+                print(get_text('conversation_started'))
             elif user_input.startswith(COMMAND_CD):
                 dir_name = user_input[len(COMMAND_CD):].strip()
                 if os.path.isdir(dir_name):
@@ -676,6 +885,9 @@ def main():
             continue
         except EOFError:
             save_memory()
+            if file_watcher is not None:
+                # Stopping the watcher saves the changes it applied to the index.
+                file_watcher.stop()
             print(get_text('exiting'))
             break
         except Exception as e:
@@ -1,7 +1,12 @@
 import os
+import threading
+from collections import Counter
+from typing import Callable, List, Tuple
+from loguru import logger
 from prompt_toolkit.completion import Completer, Completion
 from auto_coder_chat_lite.common.command_completer import CommandTextParser
-from auto_coder_chat_lite.project import get_all_file_names_in_project, get_all_file_in_project, get_all_dir_names_in_project, get_all_file_in_project_with_dot
+from auto_coder_chat_lite.common.completion_index import CompletionIndex
+from auto_coder_chat_lite.project import get_project_files
 from auto_coder_chat_lite.constants import (
     CONF_AUTO_COMPLETE,
     COMMAND_ADD_FILES,
@@ -10,16 +15,46 @@ from auto_coder_chat_lite.constants import (
     COMMAND_EXCLUDE_DIRS,
     COMMAND_CONF,
     COMMAND_CD,
+    PROJECT_ROOT,
 )
 
+# The most completions offered per index lookup.
+COMPLETION_LIMIT = 100
+
+
+def project_path(path: str) -> str:
+    """
+    Return an absolute path relative to PROJECT_ROOT, as @mention completions show it.
+    """
+    root = os.path.join(PROJECT_ROOT, "")
+    return path[len(root):] if path.startswith(root) else path
+
+
 class CommandCompleter(Completer):
+    """
+    Complete commands, configuration keys, project files and directories.
+
+    The project file lists are loaded on a background thread, so creating the
+    completer never walks the project. Until the first load finishes, file and
+    directory completions are served from empty indexes, while commands,
+    configuration keys and the active files complete as usual.
+    """
+
     def __init__(self, commands):
         self.commands = commands
-        self.all_file_names = get_all_file_names_in_project()
-        self.all_files = get_all_file_in_project()
-        self.all_dir_names = get_all_dir_names_in_project()
-        self.all_files_with_dot = get_all_file_in_project_with_dot()
         self.current_file_names = []
+        # How many files and directories have each name, since a name only
+        # leaves its index once the last of them is removed.
+        self._file_name_counts = Counter()
+        self._dir_name_counts = Counter()
+        self.file_name_index = CompletionIndex(())
+        self.file_index = CompletionIndex(())
+        self.dir_name_index = CompletionIndex(())
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._loading = None
+        self._stale = False
+        self._ready_callbacks: List[Callable[[], None]] = []
 
     def get_completions(self, document, complete_event):
         text = document.text_before_cursor
@@ -28,9 +63,8 @@ class CommandCompleter(Completer):
         if len(words) > 0:
             if words[0] == COMMAND_ADD_FILES:
                 current_word = words[-1]
-                for file_name in self.all_file_names:
-                    if file_name.startswith(current_word):
-                        yield Completion(file_name, start_position=-len(current_word))
+                for file_name in self.file_name_index.prefix(current_word, COMPLETION_LIMIT):
+                    yield Completion(file_name, start_position=-len(current_word))
             elif words[0] == COMMAND_REMOVE_FILES:
                 current_word = words[-1]
                 for file_name in self.current_file_names:
@@ -38,14 +72,12 @@ class CommandCompleter(Completer):
                         yield Completion(file_name, start_position=-len(current_word))
             elif words[0] == COMMAND_EXCLUDE_DIRS:
                 current_word = words[-1]
-                for dir_name in self.all_dir_names:
-                    if dir_name.startswith(current_word):
-                        yield Completion(dir_name, start_position=-len(current_word))
+                for dir_name in self.dir_name_index.prefix(current_word, COMPLETION_LIMIT):
+                    yield Completion(dir_name, start_position=-len(current_word))
             elif words[0] == COMMAND_CD:
                 current_word = words[-1]
-                for dir_name in self.all_dir_names:
-                    if dir_name.startswith(current_word):
-                        yield Completion(dir_name, start_position=-len(current_word))
+                for dir_name in self.dir_name_index.prefix(current_word, COMPLETION_LIMIT):
+                    yield Completion(dir_name, start_position=-len(current_word))
             elif words[0] == COMMAND_CODING:
                 new_text = text[len(words[0]) :]
                 parser = CommandTextParser(new_text, words[0])
@@ -74,14 +106,18 @@ class CommandCompleter(Completer):
                                 display=f"{display_name} (in active files)",
                             )
 
-                    for file_name in self.all_file_names:
-                        if file_name.startswith(name) and file_name not in target_set:
+                    for file_name in self.file_name_index.prefix(name, COMPLETION_LIMIT):
+                        if file_name not in target_set:
                             target_set.add(file_name)
                             yield Completion(file_name, start_position=-len(name))
 
-                    for file_name in self.all_files:
-                        if name in file_name and file_name not in target_set:
-                            yield Completion(file_name, start_position=-len(name))
+                    # Mentions resolve base names, so a path matched anywhere
+                    # inserts its base name and shows the path.
+                    for path in self.file_index.search(name, COMPLETION_LIMIT) if name else ():
+                        file_name = os.path.basename(path)
+                        if file_name not in target_set:
+                            target_set.add(file_name)
+                            yield Completion(file_name, start_position=-len(name), display=path)
             elif words[0] == COMMAND_CONF:
                 current_word = words[-1]
                 if len(words) == 1 and text[-1] == ' ':
@@ -114,8 +150,118 @@ class CommandCompleter(Completer):
     def update_current_files(self, files):
         self.current_file_names = [os.path.basename(f) for f in files]
 
-    def refresh_files(self):
-        self.all_file_names = get_all_file_names_in_project()
-        self.all_files = get_all_file_in_project()
-        self.all_dir_names = get_all_dir_names_in_project()
-        self.all_files_with_dot = get_all_file_in_project_with_dot()
\ No newline at end of file
+    def refresh_files(self, background: bool = False):
+        """
+        Reload the project file lists and rebuild the indexes.
+
+        :param background: Load on a background thread and return immediately.
+            The current indexes keep serving completions until the new ones are swapped in.
+        """
+        if not background:
+            self._load_files()
+            return
+        with self._lock:
+            if self._loading is not None:
+                # Make the running load start over so it sees the latest state.
+                self._stale = True
+                return
+            self._loading = threading.Thread(target=self._load_in_background, name="completer-load", daemon=True)
+            self._loading.start()
+
+    def _load_files(self):
+        project_files = get_project_files()
+        file_name_counts = Counter(project_files.file_names)
+        dir_name_counts = Counter(project_files.dir_names)
+        file_name_index = CompletionIndex(file_name_counts)
+        file_index = CompletionIndex(project_path(path) for path in project_files.files)
+        dir_name_index = CompletionIndex(dir_name_counts)
+        with self._lock:
+            self._file_name_counts = file_name_counts
+            self._dir_name_counts = dir_name_counts
+            self.file_name_index = file_name_index
+            self.file_index = file_index
+            self.dir_name_index = dir_name_index
+        self._set_ready()
+
+    def _load_in_background(self):
+        while True:
+            try:
+                self._load_files()
+            except Exception as e:
+                logger.error(f"Failed to load project files for completion: {e}")
+            with self._lock:
+                if not self._stale:
+                    self._loading = None
+                    return
+                self._stale = False
+
+    def _set_ready(self):
+        with self._lock:
+            callbacks, self._ready_callbacks = self._ready_callbacks, []
+            self.ready.set()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Completer ready callback failed: {e}")
+
+    def when_ready(self, callback: Callable[[], None]):
+        """
+        Call callback once the project files have been loaded, right away if
+        they already are, otherwise from the loading thread.
+
+        :param callback: The function to call without arguments.
+        """
+        with self._lock:
+            if not self.ready.is_set():
+                self._ready_callbacks.append(callback)
+                return
+        callback()
+
+    @staticmethod
+    def _count_names(counts: Counter, added: List[str], removed: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Count the base names of added and removed paths.
+
+        :return: The names that appeared, and the names no path has any more.
+        """
+        appeared, gone = [], []
+        for path in removed:
+            name = os.path.basename(path)
+            counts[name] -= 1
+            if counts[name] <= 0:
+                del counts[name]
+                gone.append(name)
+        for path in added:
+            name = os.path.basename(path)
+            counts[name] += 1
+            if counts[name] == 1:
+                appeared.append(name)
+        return appeared, gone
+
+    def apply_changes(self, changes):
+        """
+        Apply the files and directories added or removed on disk, as reported
+        by the file watcher, without rescanning the project.
+
+        The indexes are patched in time proportional to the changes, see
+        CompletionIndex.updated, and the patched copies are swapped in under
+        the lock, because this runs on the watcher thread while completions
+        may be iterating the current ones.
+
+        :param changes: The IndexChanges to apply.
+        """
+        with self._lock:
+            if self._loading is not None:
+                # The running load may have listed the project before these
+                # changes; reload once it is done instead of patching its result.
+                self._stale = True
+                return
+            added_names, removed_names = self._count_names(
+                self._file_name_counts, changes.added_files, changes.removed_files)
+            self.file_name_index = self.file_name_index.updated(added_names, removed_names)
+            self.file_index = self.file_index.updated(
+                map(project_path, changes.added_files), map(project_path, changes.removed_files))
+            added_names, removed_names = self._count_names(
+                self._dir_name_counts, changes.added_dirs, changes.removed_dirs)
+            self.dir_name_index = self.dir_name_index.updated(added_names, removed_names)
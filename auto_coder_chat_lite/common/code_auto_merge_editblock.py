@@ -8,7 +8,8 @@ from auto_coder_chat_lite.utils.queue_communicate import (
     CommunicateEvent,
     CommunicateEventType,
 )
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 import pydantic
 from loguru import logger
 import hashlib
@@ -32,6 +33,23 @@ class CodeAutoMergeEditBlock:
         self.args = args
         self.fence_0 = fence_0
         self.fence_1 = fence_1
+        # (head, file content) -> (similarity, best window), filled in ahead
+        # of the merge by EditBlockStream.
+        self.matches: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
+    def best_matching_window(self, head: str, content: str) -> Tuple[float, str]:
+        """
+        Find the window of content most similar to a SEARCH block, see TextSimilarity.
+
+        :param head: The SEARCH block.
+        :param content: The content of the file.
+        :return: The similarity and the best matching window.
+        """
+        key = (head, content)
+        match = self.matches.get(key)
+        if match is None:
+            match = self.matches[key] = TextSimilarity(head, content).get_best_matching_window()
+        return match
 
     def run_pylint(self, code: str) -> tuple[bool, str]:
         with tempfile.NamedTemporaryFile(
@@ -103,35 +121,40 @@ class CodeAutoMergeEditBlock:
         return path_and_code_list
 
     def get_edits(self, content: str):
-        edits = self.parse_whole_text(content)
+        return [self.split_edit(edit) for edit in self.parse_whole_text(content)]
+
+    def split_edit(self, edit: PathAndCode) -> Tuple[str, str, str]:
+        """
+        Split a parsed block into its SEARCH and REPLACE parts.
+
+        :param edit: The block, as returned by parse_whole_text.
+        :return: The (path, head, update) of the block.
+        """
         HEAD = "<<<<<<< SEARCH"
         DIVIDER = "======="
         UPDATED = ">>>>>>> REPLACE"
-        result = []
-        for edit in edits:
-            heads = []
-            updates = []
-            c = edit.content
-            in_head = False
-            in_updated = False
-            for line in c.splitlines():
-                if line.strip() == HEAD:
-                    in_head = True
-                    continue
-                if line.strip() == DIVIDER:
-                    in_head = False
-                    in_updated = True
-                    continue
-                if line.strip() == UPDATED:
-                    in_head = False
-                    in_updated = False
-                    continue
-                if in_head:
-                    heads.append(line)
-                if in_updated:
-                    updates.append(line)
-            result.append((edit.path, "\n".join(heads), "\n".join(updates)))
-        return result
+        heads = []
+        updates = []
+        c = edit.content
+        in_head = False
+        in_updated = False
+        for line in c.splitlines():
+            if line.strip() == HEAD:
+                in_head = True
+                continue
+            if line.strip() == DIVIDER:
+                in_head = False
+                in_updated = True
+                continue
+            if line.strip() == UPDATED:
+                in_head = False
+                in_updated = False
+                continue
+            if in_head:
+                heads.append(line)
+            if in_updated:
+                updates.append(line)
+        return edit.path, "\n".join(heads), "\n".join(updates)
 
     def merge_code(self, content: str, force_skip_git: bool = False, confirm: bool = False):
         """
@@ -192,9 +215,9 @@ class CodeAutoMergeEditBlock:
                 else:
                     ## If the SEARCH BLOCK is not found exactly, then try to use
                     ## the similarity ratio to find the best matching block
-                    similarity, best_window = TextSimilarity(
+                    similarity, best_window = self.best_matching_window(
                         head, existing_content
-                    ).get_best_matching_window()
+                    )
                     if similarity > self.args.editblock_similarity:
                         new_content = existing_content.replace(best_window, update, 1)
                         if new_content != existing_content:
@@ -269,4 +292,95 @@ class CodeAutoMergeEditBlock:
                 f"Merged changes in {len(file_content_mapping.keys())} files {len(changes_to_make)}/{len(codes)} blocks."
             )
         else:
-            logger.warning("No changes were made to any files.")
\ No newline at end of file
+            logger.warning("No changes were made to any files.")
+
+
+class EditBlockStream:
+    """
+    Parse the SEARCH/REPLACE blocks of a response while it is streamed.
+
+    Lines are fed to the same state machine as parse_whole_text, and every
+    block is checked as soon as its closing fence arrives: on a background
+    thread, it is matched against the target file as modified by the blocks
+    before it, exactly or by similarity, the way merge_code will. The
+    similarity matches are kept in the merger, so merging the complete
+    response right after the stream ends does not compute them again.
+    """
+
+    UPDATED = ">>>>>>> REPLACE"
+
+    def __init__(self, merger: CodeAutoMergeEditBlock):
+        """
+        Initialize the parser.
+
+        :param merger: The merger the response will be merged with.
+        """
+        self.merger = merger
+        self.blocks: List[Tuple[str, str, str]] = []
+        # The (path, head, update, similarity) of the blocks that do not match their file.
+        self.unmatched: List[Tuple[str, str, str, float]] = []
+        self._partial = ""
+        self._previous_line = ""
+        self._fence_line: Optional[str] = None
+        self._block: Optional[List[str]] = None
+        self._contents: Dict[str, str] = {}
+        self._checks: List[Future] = []
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="editblock-check")
+
+    def feed(self, chunk: str):
+        """
+        Feed a chunk of the response.
+        """
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._feed_line(line)
+
+    def _feed_line(self, line: str):
+        if self._block is None:
+            if self._fence_line is not None and line.startswith("##File:"):
+                self._block = [line]
+            self._fence_line = line if line.startswith(self.merger.fence_0) else None
+        elif line.startswith(self.merger.fence_1) and self.UPDATED in self._previous_line:
+            self._emit(self._block)
+            self._block = None
+        else:
+            self._block.append(line)
+        self._previous_line = line
+
+    def _emit(self, block: List[str]):
+        path = block[0].split(":", 1)[1].strip()
+        edit = self.merger.split_edit(PathAndCode(path=path, content="\n".join(block[1:])))
+        self.blocks.append(edit)
+        self._checks.append(self._executor.submit(self._check, *edit))
+
+    def _check(self, file_path: str, head: str, update: str):
+        if not os.path.exists(file_path):
+            self._contents[file_path] = update
+            return
+        if file_path not in self._contents:
+            with open(file_path, "r", encoding="utf-8") as f:
+                self._contents[file_path] = f.read()
+        existing_content = self._contents[file_path]
+        new_content = existing_content.replace(head, update, 1) if head else existing_content + "\n" + update
+        if new_content == existing_content:
+            similarity, best_window = self.merger.best_matching_window(head, existing_content)
+            if similarity <= self.merger.args.editblock_similarity:
+                self.unmatched.append((file_path, head, update, similarity))
+                return
+            new_content = existing_content.replace(best_window, update, 1)
+        self._contents[file_path] = new_content
+
+    def close(self) -> List[Tuple[str, str, str, float]]:
+        """
+        Parse the rest of the response and wait for the checks of all blocks.
+
+        :return: The (path, head, update, similarity) of the blocks that do not match their file.
+        """
+        if self._partial:
+            self._feed_line(self._partial)
+            self._partial = ""
+        for check in self._checks:
+            check.result()
+        self._executor.shutdown()
+        return self.unmatched
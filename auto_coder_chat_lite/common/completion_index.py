@@ -0,0 +1,217 @@
+import os
+import copy
+import heapq
+import bisect
+from itertools import accumulate, chain, islice
+from array import array
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Set
+
+# Separates the items in the blob; it cannot occur in file names.
+SEPARATOR = "\0"
+GRAM_SIZE = 3
+GRAM_CACHE_SIZE = 512
+# Trigrams occurring in more items than this are too common to narrow a
+# search down; a scan that stops at the result limit is cheaper for them.
+MAX_POSTINGS = 5000
+# Candidate sets this small are verified directly instead of being narrowed
+# down with more trigrams.
+FEW_CANDIDATES = 1000
+# An update keeps its changes in an overlay until they outnumber both of
+# these, 1/OVERLAY_RATIO of the items, then the index is rebuilt.
+OVERLAY_SIZE = 1000
+OVERLAY_RATIO = 32
+
+
+class CompletionIndex:
+    """
+    A prefix and substring index over a list of names or paths.
+
+    Prefix lookups bisect sorted arrays of the items and of their base names.
+    Substring lookups intersect trigram posting lists, which are built lazily
+    from one joined string of all items and cached, so a keystroke only scans
+    for trigrams it has not seen before. Every lookup stops once it has enough
+    results, and results are ranked by match quality.
+
+    The index is never mutated: updated returns a copy that shares these
+    structures and records the changes in a small overlay of added and
+    removed items.
+    """
+
+    def __init__(self, items: Iterable[str]):
+        """
+        Build the index.
+
+        :param items: The names or paths to complete, duplicates are dropped.
+        """
+        self.items: List[str] = sorted(set(items))
+        basenames = [os.path.basename(item) for item in self.items]
+        self._basename_ids = sorted(range(len(self.items)), key=basenames.__getitem__)
+        self._basenames = [basenames[item_id] for item_id in self._basename_ids]
+        self._blob = SEPARATOR.join(self.items)
+        # Start offset of every item in the blob, plus the end of the blob.
+        self._offsets = array("Q", accumulate((len(item) + 1 for item in self.items), initial=0))
+        self._grams: "OrderedDict[str, Optional[array]]" = OrderedDict()
+        self._added: List[str] = []
+        self._removed: frozenset = frozenset()
+
+    def __len__(self):
+        return len(self.items) - len(self._removed) + len(self._added)
+
+    def _in_items(self, item: str) -> bool:
+        i = bisect.bisect_left(self.items, item)
+        return i < len(self.items) and self.items[i] == item
+
+    def updated(self, added: Iterable[str] = (), removed: Iterable[str] = ()) -> "CompletionIndex":
+        """
+        Return a copy of the index with items added and removed.
+
+        The copy takes time in the size of the overlay rather than of the
+        index, until the overlay outgrows OVERLAY_SIZE and 1/OVERLAY_RATIO of
+        the items and is merged in by a rebuild.
+
+        :param added: The items to add, items already indexed are ignored.
+        :param removed: The items to remove, removed before added are applied.
+        :return: The updated index.
+        """
+        added_items = set(self._added)
+        removed_items = set(self._removed)
+        for item in removed:
+            if item in added_items:
+                added_items.discard(item)
+            elif self._in_items(item):
+                removed_items.add(item)
+        for item in added:
+            if item in removed_items:
+                removed_items.discard(item)
+            elif not self._in_items(item):
+                added_items.add(item)
+        if len(added_items) + len(removed_items) > max(OVERLAY_SIZE, len(self.items) // OVERLAY_RATIO):
+            return CompletionIndex(chain((item for item in self.items if item not in removed_items), added_items))
+        index = copy.copy(self)
+        index._added = sorted(added_items)
+        index._removed = frozenset(removed_items)
+        return index
+
+    def _prefix_ids(self, keys: List[str], prefix: str, limit: int) -> range:
+        start = bisect.bisect_left(keys, prefix)
+        end = start
+        while end < len(keys) and end - start < limit and keys[end].startswith(prefix):
+            end += 1
+        return range(start, end)
+
+    @staticmethod
+    def _iter_prefix(keys: List[str], prefix: str) -> Iterator[str]:
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            yield keys[i]
+            i += 1
+
+    def prefix(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Return the items starting with prefix, in sorted order.
+
+        :param prefix: The prefix to look up.
+        :param limit: The maximum number of items to return.
+        :return: The matching items.
+        """
+        limit = len(self) if limit is None else limit
+        if not self._added and not self._removed:
+            ids = self._prefix_ids(self.items, prefix, limit)
+            return self.items[ids.start:ids.stop]
+        items = (item for item in self._iter_prefix(self.items, prefix) if item not in self._removed)
+        return list(islice(heapq.merge(items, self._iter_prefix(self._added, prefix)), limit))
+
+    def _item_id(self, pos: int) -> int:
+        return bisect.bisect_right(self._offsets, pos) - 1
+
+    def _postings(self, gram: str) -> Optional[array]:
+        if gram in self._grams:
+            self._grams.move_to_end(gram)
+            return self._grams[gram]
+        postings = array("I")
+        pos = self._blob.find(gram)
+        while pos >= 0:
+            item_id = self._item_id(pos)
+            postings.append(item_id)
+            if len(postings) > MAX_POSTINGS:
+                postings = None
+                break
+            pos = self._blob.find(gram, self._offsets[item_id + 1])
+        self._grams[gram] = postings
+        if len(self._grams) > GRAM_CACHE_SIZE:
+            self._grams.popitem(last=False)
+        return postings
+
+    def _scan(self, text: str, limit: int, found: Set[int]):
+        pos = 0
+        while len(found) < limit:
+            pos = self._blob.find(text, pos)
+            if pos < 0:
+                break
+            item_id = self._item_id(pos)
+            found.add(item_id)
+            pos = self._offsets[item_id + 1]
+
+    def _substring_ids(self, text: str, limit: int, found: Set[int]):
+        candidates = None
+        if len(text) >= GRAM_SIZE:
+            grams = {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+            # Reuse the posting lists of earlier keystrokes first, and only scan
+            # for new trigrams while the candidates are still too many.
+            for gram in sorted(grams, key=lambda gram: gram not in self._grams):
+                postings = self._postings(gram)
+                if postings is None:
+                    continue
+                candidates = set(postings) if candidates is None else candidates.intersection(postings)
+                if len(candidates) <= FEW_CANDIDATES:
+                    break
+        if candidates is None:
+            self._scan(text, limit, found)
+            return
+        for item_id in sorted(candidates):
+            if text in self.items[item_id]:
+                found.add(item_id)
+                if len(found) >= limit:
+                    break
+
+    @staticmethod
+    def _rank(item: str, text: str) -> tuple:
+        basename = os.path.basename(item)
+        if basename == text:
+            quality = 0
+        elif basename.startswith(text):
+            quality = 1
+        elif item.startswith(text):
+            quality = 2
+        elif text in basename:
+            quality = 3
+        else:
+            quality = 4
+        return quality, len(item), item
+
+    def search(self, text: str, limit: int = 100) -> List[str]:
+        """
+        Return up to limit items containing text, best matches first.
+
+        Exact and prefix matches of the base name rank before prefix matches of
+        the whole item, which rank before plain substring matches; ties are
+        broken by length.
+
+        :param text: The text to look for.
+        :param limit: The maximum number of items to return.
+        :return: The matching items.
+        """
+        if not text:
+            return self.prefix("", limit)
+        # Removed items may take up some of the results, so look for as many more.
+        wanted = limit + len(self._removed)
+        found = set()
+        for i in self._prefix_ids(self._basenames, text, wanted):
+            found.add(self._basename_ids[i])
+        found.update(self._prefix_ids(self.items, text, wanted))
+        if len(found) < wanted:
+            self._substring_ids(text, wanted, found)
+        matches = [self.items[item_id] for item_id in found if self.items[item_id] not in self._removed]
+        matches.extend(item for item in self._added if text in item)
+        return sorted(matches, key=lambda item: self._rank(item, text))[:limit]
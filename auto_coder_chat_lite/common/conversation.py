@@ -0,0 +1,90 @@
+import difflib
+import hashlib
+from typing import Dict, List, NamedTuple, Tuple
+
+
+def content_digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ContextDelta(NamedTuple):
+    # Files not sent before, or whose diff would be longer than the file.
+    added: List[Tuple[str, str]]
+    # The unified diffs of files changed since they were last sent.
+    changed: List[Tuple[str, str]]
+    unchanged: List[str]
+    # Files sent before that are no longer part of the context.
+    removed: List[str]
+
+
+class Conversation:
+    """
+    Track the context files sent during a multi-turn coding conversation.
+
+    The first turn sends every file in full. Follow-up turns only send the
+    files that are new to the conversation and the unified diffs of the files
+    that changed since they were last sent, since the model already has the
+    rest. Every turn is recorded in turns as the query and the content digest
+    of every file sent, the texts needed for the diffs and the messages
+    exchanged with the model are only kept for the running session.
+    """
+
+    def __init__(self):
+        self.turns: List[dict] = []
+        self.messages: List[Dict[str, str]] = []
+        self._sent: Dict[str, str] = {}
+
+    def start(self, turns: List[dict]):
+        """
+        Start a new conversation.
+
+        :param turns: The list the turns are recorded into, it is cleared.
+        """
+        turns.clear()
+        self.turns = turns
+        self.messages = []
+        self._sent = {}
+
+    @property
+    def active(self) -> bool:
+        return bool(self.turns)
+
+    def delta(self, contents: List[Tuple[str, str]]) -> ContextDelta:
+        """
+        Compare the context files of a turn with what the conversation already sent.
+
+        :param contents: The (file_path, file_code) of the context files of the turn.
+        :return: The ContextDelta of the turn.
+        """
+        added, changed, unchanged = [], [], []
+        for file_path, file_code in contents:
+            previous = self._sent.get(file_path)
+            if previous == file_code:
+                unchanged.append(file_path)
+                continue
+            if previous is not None:
+                diff = "".join(difflib.unified_diff(
+                    previous.splitlines(keepends=True), file_code.splitlines(keepends=True),
+                    file_path, file_path, n=2))
+                if len(diff) < len(file_code):
+                    changed.append((file_path, diff))
+                    continue
+            added.append((file_path, file_code))
+        paths = {file_path for file_path, _ in contents}
+        removed = [file_path for file_path in self._sent if file_path not in paths]
+        return ContextDelta(added, changed, unchanged, removed)
+
+    def record(self, query: str, contents: List[Tuple[str, str]], prompt: str, response: str):
+        """
+        Record a turn once the model answered it.
+
+        :param query: The user's query of the turn.
+        :param contents: The (file_path, file_code) of the context files of the turn.
+        :param prompt: The prompt sent to the model.
+        :param response: The model's response.
+        """
+        self._sent = dict(contents)
+        self.turns.append({"query": query,
+                           "files": {file_path: content_digest(file_code) for file_path, file_code in contents}})
+        self.messages.append({"role": "user", "content": prompt})
+        self.messages.append({"role": "assistant", "content": response})
@@ -0,0 +1,163 @@
+import os
+from typing import Dict, Iterable, Tuple
+from pathspec import PathSpec
+from pathspec.patterns import GitWildMatchPattern
+from loguru import logger
+
+GITIGNORE_FILE = ".gitignore"
+
+
+def normalize_exclude_dirs(exclude_dirs: Iterable[str]) -> frozenset:
+    """
+    Normalize exclude dir entries such as ".git/" or "src/gen" to a set of
+    slash separated names/paths without a trailing slash.
+    """
+    return frozenset(d.replace(os.sep, "/").strip("/") for d in exclude_dirs if d.strip("/"))
+
+
+class ExcludeMatcher:
+    """
+    A compiled matcher for the exclude dirs and the (nested) .gitignore files of a project.
+
+    Paths are matched relative to the root with "/" separators. Each .gitignore
+    is parsed once and re-parsed only when its mtime or size changes; the
+    version attribute is bumped whenever the matching rules change so callers
+    can invalidate results derived from them.
+    """
+
+    def __init__(self, root_dir: str, exclude_dirs: Iterable[str] = ()):
+        """
+        Initialize the matcher for the given root directory.
+
+        :param root_dir: The project root the .gitignore files are relative to.
+        :param exclude_dirs: Directory names or root relative paths to exclude.
+        """
+        self.root_dir = os.path.abspath(root_dir)
+        self.exclude_dirs = normalize_exclude_dirs(exclude_dirs)
+        self.version = 0
+        self._specs: Dict[str, PathSpec] = {}
+        self._stamps: Dict[str, Tuple[int, int]] = {}
+
+    def set_exclude_dirs(self, exclude_dirs: Iterable[str]):
+        exclude_dirs = normalize_exclude_dirs(exclude_dirs)
+        if exclude_dirs != self.exclude_dirs:
+            self.exclude_dirs = exclude_dirs
+            self.version += 1
+
+    def load_gitignore(self, rel_dir: str = "") -> bool:
+        """
+        Load or re-validate the .gitignore of a directory.
+
+        :param rel_dir: The root relative directory containing the .gitignore.
+        :return: True if the rules of the directory changed.
+        """
+        dir_path = os.path.join(self.root_dir, *rel_dir.split("/")) if rel_dir else self.root_dir
+        gitignore_path = os.path.join(dir_path, GITIGNORE_FILE)
+        try:
+            st = os.stat(gitignore_path)
+        except OSError:
+            return self.drop_gitignore(rel_dir)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._stamps.get(rel_dir) == stamp:
+            return False
+        try:
+            with open(gitignore_path, "r", encoding="utf-8") as f:
+                self._specs[rel_dir] = PathSpec.from_lines(GitWildMatchPattern, f.read().splitlines())
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Ignoring unreadable {gitignore_path}: {e}")
+            self._specs.pop(rel_dir, None)
+        self._stamps[rel_dir] = stamp
+        self.version += 1
+        return True
+
+    def drop_gitignore(self, rel_dir: str) -> bool:
+        if rel_dir not in self._stamps:
+            return False
+        self._specs.pop(rel_dir, None)
+        del self._stamps[rel_dir]
+        self.version += 1
+        return True
+
+    def retain_gitignores(self, rel_dirs: Iterable[str]):
+        """
+        Forget the .gitignore files of directories that are no longer in the tree.
+
+        :param rel_dirs: The directories known to contain a .gitignore.
+        """
+        for rel_dir in set(self._stamps) - set(rel_dirs) - {""}:
+            self.drop_gitignore(rel_dir)
+
+    def match(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        Check if a path is excluded, assuming its parent directory is not.
+
+        This is what a traversal that prunes excluded directories needs: only
+        the last path component is tested against the exclude dirs, and the
+        deepest .gitignore with a matching pattern decides.
+
+        :param rel_path: The root relative path with "/" separators.
+        :param is_dir: Whether the path is a directory.
+        :return: True if the path is excluded.
+        """
+        if is_dir:
+            name = rel_path.rsplit("/", 1)[-1]
+            if name in self.exclude_dirs or rel_path in self.exclude_dirs:
+                return True
+        if not self._specs:
+            return False
+        suffix = "/" if is_dir else ""
+        parent = rel_path.rsplit("/", 1)[0] if "/" in rel_path else ""
+        while True:
+            spec = self._specs.get(parent)
+            if spec is not None:
+                sub_path = rel_path[len(parent) + 1:] if parent else rel_path
+                result = spec.check_file(sub_path + suffix)
+                if result.include is not None:
+                    return result.include
+            if not parent:
+                return False
+            parent = parent.rsplit("/", 1)[0] if "/" in parent else ""
+
+    def is_excluded(self, path: str) -> bool:
+        """
+        Check if an absolute or root relative path, or any of its parent
+        directories, is excluded.
+
+        Paths outside the root are only checked against the exclude dir names.
+
+        :param path: The path to check.
+        :return: True if the path is excluded.
+        """
+        abs_path = os.path.abspath(os.path.join(self.root_dir, path))
+        rel_path = os.path.relpath(abs_path, self.root_dir)
+        if rel_path == "." or rel_path.startswith(".."):
+            return any(part in self.exclude_dirs for part in abs_path.split(os.sep))
+        parts = rel_path.split(os.sep)
+        for i in range(1, len(parts)):
+            if self.match("/".join(parts[:i]), is_dir=True):
+                return True
+        return self.match("/".join(parts), is_dir=os.path.isdir(abs_path))
+
+
+_matchers: Dict[str, ExcludeMatcher] = {}
+
+
+def get_exclude_matcher(root_dir: str, exclude_dirs: Iterable[str] = ()) -> ExcludeMatcher:
+    """
+    Return the shared matcher for a root directory.
+
+    The root .gitignore is re-validated on every call; nested ones are
+    re-validated by the file index when it visits their directory.
+
+    :param root_dir: The project root.
+    :param exclude_dirs: Directory names or root relative paths to exclude.
+    :return: The ExcludeMatcher.
+    """
+    root_dir = os.path.abspath(root_dir)
+    matcher = _matchers.get(root_dir)
+    if matcher is None:
+        matcher = _matchers[root_dir] = ExcludeMatcher(root_dir, exclude_dirs)
+    else:
+        matcher.set_exclude_dirs(exclude_dirs)
+    matcher.load_gitignore("")
+    return matcher
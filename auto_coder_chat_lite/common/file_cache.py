@@ -0,0 +1,126 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Tuple
+from auto_coder_chat_lite.common.file_index import RACY_MTIME_NS
+from auto_coder_chat_lite.common.file_reader import MAX_CONTEXT_BYTES, MAX_FILE_BYTES, read_text
+
+# The total length of the cached file contents.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# The most files read concurrently by read_many.
+READ_WORKERS = 8
+
+
+class ReadResult(NamedTuple):
+    contents: List[Tuple[str, str]]
+    # The wall time of the whole load, and the sum of the time of every read.
+    wall_time: float
+    read_time: float
+
+
+class FileContentCache:
+    """
+    A least recently used cache of text file contents, as read by read_text.
+
+    Entries are validated against the (mtime, size, inode) of the file on every
+    read, so a changed or replaced file is read again while unchanged files are
+    served from memory. The cache is bounded by the total length of the cached texts.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        :param max_bytes: The maximum total length of the cached texts.
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[tuple, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, file_path: str, max_file_bytes: int = MAX_FILE_BYTES) -> str:
+        """
+        Return the contents of a text file, from the cache if it did not change.
+
+        :param file_path: The path of the file.
+        :param max_file_bytes: The maximum number of bytes of the file to keep, see read_text.
+        :return: The file contents, or an excerpt of them.
+        """
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino, max_file_bytes)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        content = read_text(path, max_file_bytes, st.st_size)
+        # A file modified within the mtime granularity could change again
+        # without its stamp changing, so it is not cached until it settles.
+        if len(content) <= self.max_bytes and time.time_ns() - st.st_mtime_ns >= RACY_MTIME_NS:
+            self._put(path, stamp, content)
+        return content
+
+    def read_many(self, file_paths: List[str], max_file_bytes: int = MAX_FILE_BYTES,
+                  max_total_bytes: int = MAX_CONTEXT_BYTES, workers: int = READ_WORKERS) -> ReadResult:
+        """
+        Read several files on a thread pool and return them in the given order.
+
+        The files are read concurrently, each capped at max_file_bytes, and the
+        total cap is then applied in order: a file crossing it is read again
+        with the remaining bytes as its cap, and the files after it are
+        replaced by a note.
+
+        :param file_paths: The files to read.
+        :param max_file_bytes: The maximum number of bytes kept of one file.
+        :param max_total_bytes: The maximum number of bytes of all files together.
+        :param workers: The number of reader threads.
+        :return: A ReadResult with the (file_path, content) of every file.
+        """
+        start = time.perf_counter()
+
+        def timed_read(file_path: str) -> Tuple[str, float]:
+            read_start = time.perf_counter()
+            content = self.read(file_path, max_file_bytes)
+            return content, time.perf_counter() - read_start
+
+        if workers > 1 and len(file_paths) > 1:
+            with ThreadPoolExecutor(min(workers, len(file_paths)), thread_name_prefix="file-read") as pool:
+                results = list(pool.map(timed_read, file_paths))
+        else:
+            results = [timed_read(file_path) for file_path in file_paths]
+
+        remaining = max_total_bytes
+        contents = []
+        for file_path, (content, _) in zip(file_paths, results):
+            if remaining <= 0:
+                content = f"[omitted, the context size limit of {max_total_bytes:,} bytes was reached]"
+            else:
+                size = len(content.encode("utf-8"))
+                if size > remaining:
+                    # The excerpt bypasses the cache, so it does not replace the full entry.
+                    content = read_text(os.path.abspath(file_path), remaining)
+                    size = len(content.encode("utf-8"))
+                remaining -= size
+            contents.append((file_path, content))
+        return ReadResult(contents, time.perf_counter() - start, sum(read_time for _, read_time in results))
+
+    def _put(self, path: str, stamp: tuple, content: str):
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self.total_bytes -= len(old[1])
+            self._entries[path] = (stamp, content)
+            self.total_bytes += len(content)
+            while self.total_bytes > self.max_bytes:
+                _, (_, old_content) = self._entries.popitem(last=False)
+                self.total_bytes -= len(old_content)
+
+
+file_cache = FileContentCache()
@@ -0,0 +1,433 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from loguru import logger
+from auto_coder_chat_lite.constants import PROJECT_DIR
+from auto_coder_chat_lite.common.exclude_matcher import ExcludeMatcher, GITIGNORE_FILE, get_exclude_matcher
+
+INDEX_VERSION = 1
+
+# Directories modified this recently may still change within the same mtime
+# tick, so their listing is never trusted on the next refresh.
+RACY_MTIME_NS = 2_000_000_000
+
+# Where get_file_index persists the indexes, one file per root directory.
+INDEX_DIR = os.path.join(PROJECT_DIR, "file_index")
+
+
+class IndexChanges:
+    """
+    The absolute paths of the files and directories added to or removed from an index.
+    """
+
+    def __init__(self):
+        self.added_files: List[str] = []
+        self.removed_files: List[str] = []
+        self.added_dirs: List[str] = []
+        self.removed_dirs: List[str] = []
+
+    def __bool__(self):
+        return bool(self.added_files or self.removed_files or self.added_dirs or self.removed_dirs)
+
+    def record(self, dir_path: str, old_listing: Optional[dict], new_listing: Optional[dict]):
+        """
+        Record the difference between two listings of a directory.
+
+        :param dir_path: The absolute path of the directory.
+        :param old_listing: The previous listing, or None if the directory is new.
+        :param new_listing: The current listing, or None if the directory is gone.
+        """
+        for key, added, removed in (("files", self.added_files, self.removed_files),
+                                    ("dirs", self.added_dirs, self.removed_dirs)):
+            old_names = set(old_listing[key]) if old_listing else set()
+            new_names = set(new_listing[key]) if new_listing else set()
+            added.extend(os.path.join(dir_path, name) for name in sorted(new_names - old_names))
+            removed.extend(os.path.join(dir_path, name) for name in sorted(old_names - new_names))
+
+
+class ProjectFileIndex:
+    """
+    An on-disk index of the directory listings of a project.
+
+    Each directory listing is stored together with the mtime of the directory,
+    so a refresh only needs one stat per directory and re-lists just the
+    directories whose entries were added, removed or renamed.
+    """
+
+    def __init__(self, root_dir: str, index_file: Optional[str] = None, workers: int = 1):
+        """
+        Initialize the index for the given root directory.
+
+        :param root_dir: The directory to index.
+        :param index_file: The JSON file the index is persisted to, or None to keep it in memory only.
+        :param workers: The number of threads listing directories concurrently, 1 to list them serially.
+        """
+        self.root_dir = os.path.abspath(root_dir)
+        self.index_file = index_file
+        self.workers = workers
+        self.matcher = ExcludeMatcher(self.root_dir)
+        self._dirs: Dict[str, dict] = {}
+        self._visible: Dict[str, tuple] = {}
+        # The (matcher, version) the visible listings were filtered with. The
+        # matcher itself is kept, since a replaced matcher restarts at version 0.
+        self._visible_key = None
+        self._loaded = False
+        # Whether listings changed since the index was last saved.
+        self._dirty = False
+        self._lock = threading.RLock()
+        # Bumped whenever a listing changes; _subtree_versions holds the
+        # generation of the last change below each directory.
+        self.generation = 0
+        self._subtree_versions: Dict[str, int] = {}
+
+    def _abs_path(self, rel_dir: str) -> str:
+        if not rel_dir:
+            return self.root_dir
+        return self.root_dir + os.sep + rel_dir.replace("/", os.sep)
+
+    def load(self):
+        """
+        Load the persisted index from disk, ignoring missing or stale files.
+        """
+        self._loaded = True
+        if not self.index_file or not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable file index {self.index_file}: {e}")
+            return
+        if data.get("version") == INDEX_VERSION and data.get("root") == self.root_dir:
+            self._dirs = data.get("dirs", {})
+            self._touch([""])
+
+    def save(self):
+        """
+        Persist the index to disk atomically.
+        """
+        if not self.index_file:
+            return
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "root": self.root_dir, "dirs": self._dirs}, f, ensure_ascii=False)
+            os.replace(tmp_file, self.index_file)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to save file index {self.index_file}: {e}")
+
+    def _scan_dir(self, path: str, mtime_ns: int) -> Tuple[dict, Dict[str, int]]:
+        """
+        List a directory with os.scandir, reusing the DirEntry type information
+        and returning the mtimes of the sub directories so they are not stat-ed
+        again when the walk descends into them.
+        """
+        dirs, files, links = [], [], []
+        dir_mtimes = {}
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(entry.name)
+                    if entry.is_symlink():
+                        links.append(entry.name)
+                    else:
+                        try:
+                            dir_mtimes[entry.name] = entry.stat().st_mtime_ns
+                        except OSError:
+                            pass
+                else:
+                    files.append(entry.name)
+        if time.time_ns() - mtime_ns < RACY_MTIME_NS:
+            mtime_ns = None
+        listing = {"mtime": mtime_ns, "dirs": sorted(dirs), "files": sorted(files)}
+        if links:
+            listing["links"] = links
+        return listing, dir_mtimes
+
+    def _read_dir(self, rel_dir: str, mtime_ns: Optional[int], cached: Optional[dict]) -> Tuple[Optional[dict], Dict[str, int]]:
+        """
+        Return the up to date listing of one directory, re-listing it only if
+        its mtime changed. This only does I/O, so it can run on a worker thread.
+        """
+        path = self._abs_path(rel_dir)
+        try:
+            if mtime_ns is None:
+                mtime_ns = os.stat(path).st_mtime_ns
+            if cached is None or cached["mtime"] != mtime_ns:
+                return self._scan_dir(path, mtime_ns)
+        except OSError:
+            return None, {}
+        return cached, {}
+
+    def _apply_listing(self, rel_dir: str, cached: Optional[dict], listing: dict,
+                       changes: Optional[IndexChanges]) -> bool:
+        """
+        Load the .gitignore of a visited directory and record what changed in it.
+        """
+        if GITIGNORE_FILE in listing["files"]:
+            self.matcher.load_gitignore(rel_dir)
+        changed = cached is None or cached["dirs"] != listing["dirs"] or cached["files"] != listing["files"]
+        if changed:
+            self._record(rel_dir, cached, listing, changes)
+        return changed
+
+    def _visit_dir(self, rel_dir: str, mtime_ns: Optional[int], old_dirs: Dict[str, dict],
+                   changes: Optional[IndexChanges]) -> Tuple[Optional[dict], Dict[str, int], bool]:
+        cached = old_dirs.get(rel_dir)
+        listing, dir_mtimes = self._read_dir(rel_dir, mtime_ns, cached)
+        if listing is None:
+            return None, dir_mtimes, False
+        return listing, dir_mtimes, self._apply_listing(rel_dir, cached, listing, changes)
+
+    def _record(self, rel_dir: str, old_listing: Optional[dict], new_listing: Optional[dict],
+                changes: Optional[IndexChanges]):
+        if changes is None:
+            return
+        changes.record(
+            self._abs_path(rel_dir),
+            self._filter(rel_dir, old_listing) if old_listing else None,
+            self._filter(rel_dir, new_listing) if new_listing else None,
+        )
+
+    def _sub_dirs(self, rel_dir: str, listing: dict, dir_mtimes: Dict[str, int]) -> List[Tuple[str, Optional[int]]]:
+        links = listing.get("links", ())
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        return [
+            (prefix + name, dir_mtimes.get(name)) for name in listing["dirs"]
+            if name not in links and not self.matcher.match(prefix + name, is_dir=True)
+        ]
+
+    def _touch(self, rel_dirs: Iterable[str]):
+        """
+        Start a new generation and stamp it on the given directories and their ancestors.
+        """
+        self.generation += 1
+        for rel_dir in rel_dirs:
+            while self._subtree_versions.get(rel_dir) != self.generation:
+                self._subtree_versions[rel_dir] = self.generation
+                if not rel_dir:
+                    break
+                rel_dir = rel_dir.rpartition("/")[0]
+
+    def subtree_version(self, dir_path: str) -> int:
+        """
+        Return the generation of the last change to the listings at or below a directory.
+
+        Anything derived from a subtree stays valid while this, and the matcher
+        version, are unchanged.
+
+        :param dir_path: An absolute directory path inside the root.
+        :return: The generation, 0 if nothing changed since the index was created.
+        """
+        return self._subtree_versions.get(self._rel_dir(dir_path), 0)
+
+    def _save_if_needed(self, changed: bool):
+        if changed or self._dirty or any(listing["mtime"] is None for listing in self._dirs.values()):
+            self.save()
+
+    def flush(self):
+        """
+        Save the index if listings changed since it was last saved.
+        """
+        with self._lock:
+            if self._dirty:
+                self.save()
+
+    def refresh(self, exclude: Union[ExcludeMatcher, Iterable[str]] = (), changes: Optional[IndexChanges] = None,
+                save: bool = True) -> bool:
+        """
+        Bring the index up to date with the file system.
+
+        Excluded directories are pruned: they are neither listed nor descended
+        into. Nested .gitignore files are picked up as their directories are
+        visited.
+
+        :param exclude: An ExcludeMatcher, or the directory names/paths to skip.
+        :param changes: An optional IndexChanges to record added and removed paths in.
+        :param save: Save the index if it changed, otherwise leave that to the next refresh or flush.
+        :return: True if any directory listing changed.
+        """
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            if not isinstance(exclude, ExcludeMatcher):
+                exclude = ExcludeMatcher(self.root_dir, exclude)
+            self.matcher = exclude
+            old_dirs = self._dirs
+            new_dirs = {}
+            changed_dirs = []
+            # Directories are visited one level at a time: the I/O of a level
+            # runs on the worker pool, and the results are applied in order so
+            # parent .gitignore files are loaded before their children are pruned.
+            def read_dir(item):
+                return self._read_dir(item[0], item[1], old_dirs.get(item[0]))
+
+            frontier = [("", None)]
+            pool = ThreadPoolExecutor(self.workers, thread_name_prefix="file-index") if self.workers > 1 else None
+            with pool or nullcontext():
+                while frontier:
+                    results = pool.map(read_dir, frontier) if pool and len(frontier) > 1 else map(read_dir, frontier)
+                    next_frontier = []
+                    for (rel_dir, _), (listing, dir_mtimes) in zip(frontier, results):
+                        if listing is None:
+                            continue
+                        if self._apply_listing(rel_dir, old_dirs.get(rel_dir), listing, changes):
+                            changed_dirs.append(rel_dir)
+                        new_dirs[rel_dir] = listing
+                        next_frontier.extend(self._sub_dirs(rel_dir, listing, dir_mtimes))
+                    frontier = next_frontier
+            self.matcher.retain_gitignores(rel_dir for rel_dir, listing in new_dirs.items() if GITIGNORE_FILE in listing["files"])
+            for rel_dir in old_dirs.keys() - new_dirs.keys():
+                changed_dirs.append(rel_dir)
+                self._record(rel_dir, old_dirs[rel_dir], None, changes)
+            self._dirs = new_dirs
+            if changed_dirs:
+                self._touch(changed_dirs)
+            if save:
+                self._save_if_needed(bool(changed_dirs))
+            else:
+                self._dirty = self._dirty or bool(changed_dirs)
+            return bool(changed_dirs)
+
+    def update_dirs(self, dir_paths: Iterable[str], changes: Optional[IndexChanges] = None) -> bool:
+        """
+        Re-list only the given directories, e.g. in response to file system events.
+
+        New sub directories are indexed recursively and removed ones are
+        dropped together with everything below them. The changes are saved by
+        the next refresh or flush, so a burst of events does not rewrite the
+        index file once per batch.
+
+        :param dir_paths: Absolute paths of the directories whose entries changed.
+        :param changes: An optional IndexChanges to record added and removed paths in.
+        :return: True if any directory listing changed.
+        """
+        with self._lock:
+            changed_dirs = []
+            stack = [(rel_dir, None) for rel_dir in {self._rel_dir(p) for p in dir_paths} if rel_dir in self._dirs]
+            while stack:
+                rel_dir, mtime_ns = stack.pop()
+                old_listing = self._dirs.get(rel_dir)
+                listing, dir_mtimes, dir_changed = self._visit_dir(rel_dir, mtime_ns, self._dirs, changes)
+                if listing is None:
+                    continue
+                self._dirs[rel_dir] = listing
+                if not dir_changed:
+                    continue
+                changed_dirs.append(rel_dir)
+                old_sub_dirs = set(old_listing["dirs"]) if old_listing else set()
+                prefix = f"{rel_dir}/" if rel_dir else ""
+                for name in old_sub_dirs - set(listing["dirs"]):
+                    self._drop_subtree(prefix + name, changes)
+                stack.extend(sub_dir for sub_dir in self._sub_dirs(rel_dir, listing, dir_mtimes) if sub_dir[0] not in self._dirs)
+            if changed_dirs:
+                self._touch(changed_dirs)
+                self._dirty = True
+            return bool(changed_dirs)
+
+    def _drop_subtree(self, rel_dir: str, changes: Optional[IndexChanges]):
+        prefix = f"{rel_dir}/"
+        for key in [key for key in self._dirs if key == rel_dir or key.startswith(prefix)]:
+            self._record(key, self._dirs.pop(key), None, changes)
+
+    def _rel_dir(self, dir_path: str) -> str:
+        rel_dir = os.path.relpath(dir_path, self.root_dir).replace(os.sep, "/")
+        return "" if rel_dir == "." else rel_dir
+
+    def _filter(self, rel_dir: str, listing: dict) -> dict:
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        match = self.matcher.match
+        return {
+            "dirs": [name for name in listing["dirs"] if not match(prefix + name, is_dir=True)],
+            "files": [name for name in listing["files"] if not match(prefix + name)],
+        }
+
+    def _listing(self, rel_dir: str) -> Tuple[List[str], List[str]]:
+        listing = self._dirs.get(rel_dir)
+        if listing is None:
+            return [], []
+        visible_key = (self.matcher, self.matcher.version)
+        if self._visible_key != visible_key:
+            self._visible.clear()
+            self._visible_key = visible_key
+        visible = self._visible.get(rel_dir)
+        if visible is None or visible[0] is not listing:
+            visible = self._visible[rel_dir] = (listing, self._filter(rel_dir, listing))
+        return visible[1]["dirs"], visible[1]["files"]
+
+    def listdir(self, dir_path: str) -> Tuple[List[str], List[str]]:
+        """
+        Return the sorted sub directory and file names of an indexed directory.
+
+        Excluded sub directories and files are left out.
+
+        :param dir_path: An absolute directory path inside the root.
+        :return: A tuple of (dirs, files), both empty if the directory is not indexed.
+        """
+        return self._listing(self._rel_dir(dir_path))
+
+    def walk(self) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """
+        Walk the indexed tree top-down in sorted order, like os.walk.
+
+        :return: An iterator of (dir_path, dirs, files) tuples.
+        """
+        stack = [""] if "" in self._dirs else []
+        while stack:
+            rel_dir = stack.pop()
+            dirs, files = self._listing(rel_dir)
+            yield self._abs_path(rel_dir), dirs, files
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            stack.extend(prefix + name for name in reversed(dirs) if prefix + name in self._dirs)
+
+    def files(self) -> List[str]:
+        """
+        Return the absolute paths of all indexed files.
+        """
+        paths = []
+        for dir_path, _, files in self.walk():
+            prefix = os.path.join(dir_path, "")
+            paths.extend(prefix + name for name in files)
+        return paths
+
+
+_indexes: Dict[str, ProjectFileIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_file_index(root_dir: str, exclude_dirs: Iterable[str] = (), workers: int = 1,
+                   index_dir: Optional[str] = None) -> ProjectFileIndex:
+    """
+    Return the shared, refreshed file index for a root directory.
+
+    The index is persisted under the project directory so a new session only
+    re-lists the directories that changed since the last one. Paths excluded by
+    exclude_dirs or a .gitignore are left out.
+
+    :param root_dir: The directory to index.
+    :param exclude_dirs: The directory names/paths to skip.
+    :param workers: The number of threads listing directories concurrently.
+    :param index_dir: The directory the index is persisted in, defaults to INDEX_DIR.
+    :return: The up to date ProjectFileIndex.
+    """
+    root_dir = os.path.abspath(root_dir)
+    with _indexes_lock:
+        index = _indexes.get(root_dir)
+        if index is None:
+            digest = hashlib.md5(root_dir.encode("utf-8")).hexdigest()
+            index_file = os.path.join(index_dir or INDEX_DIR, f"{digest}.json")
+            index = _indexes[root_dir] = ProjectFileIndex(root_dir, index_file)
+    index.workers = max(1, int(workers))
+    index.refresh(get_exclude_matcher(root_dir, exclude_dirs))
+    return index
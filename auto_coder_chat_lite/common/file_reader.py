@@ -0,0 +1,83 @@
+import os
+import mmap
+from typing import Optional
+
+# A file with a NUL byte in its first bytes is treated as binary, like git does.
+BINARY_SNIFF_BYTES = 8192
+# Files larger than this are memory-mapped, so only their excerpts are read.
+MMAP_THRESHOLD = 1024 * 1024
+# The most bytes of one file put into a prompt.
+MAX_FILE_BYTES = 256 * 1024
+# The most bytes of all context files of one prompt together.
+MAX_CONTEXT_BYTES = 2 * 1024 * 1024
+# The share of an oversized file kept from its head, the rest is kept from its tail.
+HEAD_RATIO = 0.75
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def is_binary(path: str) -> bool:
+    """
+    Check whether a file looks binary by looking for a NUL byte in its first bytes.
+    """
+    with open(path, "rb") as f:
+        return b"\0" in f.read(BINARY_SNIFF_BYTES)
+
+
+def read_text(path: str, max_bytes: int = MAX_FILE_BYTES, size: Optional[int] = None) -> str:
+    """
+    Read a text file for a prompt, keeping at most max_bytes of it.
+
+    Binary files are replaced by a one line note. Files larger than max_bytes
+    are cut to an excerpt of their head and tail around an omission marker,
+    and large files are memory-mapped so the part in between is never read.
+    Undecodable bytes are replaced instead of failing the request.
+
+    :param path: The path of the file.
+    :param max_bytes: The maximum number of bytes of the file to keep.
+    :param size: The size of the file, if it was already stat-ed.
+    :return: The text, or the excerpt, of the file.
+    """
+    if size is None:
+        size = os.path.getsize(path)
+    if size == 0:
+        return ""
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size > MMAP_THRESHOLD else f.read()
+        try:
+            if b"\0" in data[:BINARY_SNIFF_BYTES]:
+                return f"[binary file, {size:,} bytes omitted]"
+            if size <= max_bytes:
+                return _decode(data[:])
+            head_bytes = int(max_bytes * HEAD_RATIO)
+            tail_bytes = max_bytes - head_bytes
+            head = _decode(data[:head_bytes])
+            tail = _decode(data[size - tail_bytes:]) if tail_bytes > 0 else ""
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+    # Cut the excerpts at line boundaries.
+    head = head[:head.rfind("\n") + 1] or head
+    tail = tail[tail.find("\n") + 1:] or tail
+    return f"{head}\n... [{size - max_bytes:,} bytes omitted] ...\n\n{tail}"
+
+
+def describe_oversized(path: str, max_bytes: int = MAX_FILE_BYTES) -> Optional[str]:
+    """
+    Describe why a file would not be put into a prompt in full.
+
+    :param path: The path of the file.
+    :param max_bytes: The maximum number of bytes of one file.
+    :return: A short note, or None if the file is sent in full.
+    """
+    try:
+        size = os.path.getsize(path)
+        if size and is_binary(path):
+            return f"binary, {size:,} bytes omitted"
+    except OSError:
+        return None
+    if size > max_bytes:
+        return f"{size:,} bytes, only the first and last {max_bytes // 1024:,} KiB are sent"
+    return None
@@ -0,0 +1,171 @@
+import os
+import heapq
+from weakref import WeakKeyDictionary
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from auto_coder_chat_lite.common.file_index import ProjectFileIndex
+from auto_coder_chat_lite.common.token_budget import estimate_tokens
+
+# Directories with more entries than this are summarized instead of listed
+# when a budget is set, unless they hold one of the kept paths.
+MAX_DIR_ENTRIES = 200
+# Rendered subtrees are cached for directories up to this depth below the
+# root, so a change deep in one subtree leaves its siblings cached without
+# keeping a copy of the tree for every level.
+SUBTREE_CACHE_DEPTH = 2
+
+
+class _TreeCache:
+    def __init__(self):
+        # root_dir -> (key, signature, tree) of the last tree rendered for it
+        self.trees: Dict[str, Tuple[tuple, tuple, str]] = {}
+        # (dir_path, prefix) -> (signature, lines)
+        self.subtrees: Dict[Tuple[str, str], Tuple[tuple, List[str]]] = {}
+
+
+_caches: "WeakKeyDictionary[ProjectFileIndex, _TreeCache]" = WeakKeyDictionary()
+
+
+def _file_counts(index: ProjectFileIndex) -> Dict[str, int]:
+    counts = {}
+    walked = list(index.walk())
+    for dir_path, dirs, files in reversed(walked):
+        counts[dir_path] = len(files) + sum(counts.get(os.path.join(dir_path, d), 0) for d in dirs)
+    return counts
+
+
+def _kept_dirs(root_dir: str, keep_paths: Iterable[str]) -> Set[str]:
+    kept = set()
+    for path in keep_paths:
+        path = os.path.abspath(path)
+        if not path.startswith(os.path.join(root_dir, "")):
+            continue
+        dir_path = os.path.dirname(path)
+        while dir_path not in kept and len(dir_path) >= len(root_dir):
+            kept.add(dir_path)
+            dir_path = os.path.dirname(dir_path)
+    return kept
+
+
+def render_file_tree(index: ProjectFileIndex, root_dir: str, budget: Optional[int] = None,
+                     keep_paths: Iterable[str] = (), indent_char: str = '    ',
+                     count_tokens: Callable[[str], int] = estimate_tokens) -> str:
+    """
+    Render the indexed tree under root_dir like the tree command, within a token budget.
+
+    Directories are expanded breadth-first, shallow ones first, for as long as
+    their entries fit in the budget. Directories that do not fit, or that have
+    more than MAX_DIR_ENTRIES entries, are collapsed into a summary line such as
+    "gen/ (4,210 files)". The ancestors of keep_paths are always expanded, even
+    past the budget; in a large directory only the kept entries are listed.
+
+    The result is memoized per index: it is reused as long as no listing
+    changed and the exclude rules are the same, and fully expanded subtrees
+    that did not change are reused when only another part of the tree did.
+
+    :param index: The refreshed index of the project.
+    :param root_dir: The directory to render.
+    :param budget: The maximum number of tokens of the tree, None or 0 for no limit.
+    :param keep_paths: Files whose ancestors must stay expanded, e.g. the current files.
+    :param indent_char: The indentation of one tree level.
+    :param count_tokens: Returns the number of tokens of a line.
+    :return: The rendered tree.
+    """
+    root_dir = os.path.abspath(root_dir)
+    kept_paths = {os.path.abspath(path) for path in keep_paths}
+    cache = _caches.setdefault(index, _TreeCache())
+    matcher_key = (id(index.matcher), index.matcher.version)
+    tree_key = (root_dir, budget or None, frozenset(kept_paths), indent_char, count_tokens)
+    signature = (index.generation, matcher_key)
+    cached = cache.trees.get(root_dir)
+    if cached is not None and cached[:2] == (tree_key, signature):
+        return cached[2]
+
+    kept = _kept_dirs(root_dir, kept_paths)
+    counts = _file_counts(index) if budget else {}
+
+    def summary(name: str, dir_path: str) -> str:
+        # Directories the index does not descend into, such as symlinked or
+        # unreadable ones, have no count to show.
+        count = counts.get(dir_path)
+        if count is None:
+            return f"{name}/"
+        return f"{name}/ ({count:,} file{'' if count == 1 else 's'})"
+
+    # dir_path -> names of the entries to list, None for all of them.
+    expanded: Dict[str, Optional[List[str]]] = {}
+    # The expanded directories whose whole subtree is listed without summaries.
+    complete: Set[str] = set()
+    if not budget:
+        for dir_path, _, _ in index.walk():
+            expanded[dir_path] = None
+        complete.update(expanded)
+    else:
+        remaining = budget - count_tokens(f"{root_dir}/")
+        queue = [(0, False, root_dir)]
+        while queue:
+            depth, _, dir_path = heapq.heappop(queue)
+            dirs, files = index.listdir(dir_path)
+            prefix = indent_char * (depth + 1)
+            is_kept = dir_path in kept or dir_path == root_dir
+            names = dirs + files
+            dir_names = set(dirs)
+            cost = sum(count_tokens(prefix + (summary(name, os.path.join(dir_path, name)) if name in dir_names else name))
+                       for name in names) if len(names) <= MAX_DIR_ENTRIES else None
+            if cost is not None and cost <= remaining:
+                expanded[dir_path] = None
+            elif is_kept:
+                shown = [name for name in names
+                         if os.path.join(dir_path, name) in kept or os.path.join(dir_path, name) in kept_paths]
+                expanded[dir_path] = shown
+                cost = sum(count_tokens(prefix + name) for name in shown) + count_tokens(prefix + "...")
+            else:
+                continue
+            remaining -= cost
+            for name in dirs:
+                sub_dir = os.path.join(dir_path, name)
+                if expanded[dir_path] is None or name in expanded[dir_path]:
+                    heapq.heappush(queue, (depth + 1, sub_dir not in kept, sub_dir))
+        # Expansion is breadth-first, so children come after their parents.
+        for dir_path in reversed(list(expanded)):
+            if expanded[dir_path] is None and all(
+                    os.path.join(dir_path, name) in complete for name in index.listdir(dir_path)[0]):
+                complete.add(dir_path)
+
+    lines = [f"{root_dir}/"]
+
+    def list_dir(dir_path: str, prefix: str):
+        if dir_path in complete and 0 < len(prefix) <= len(indent_char) * SUBTREE_CACHE_DEPTH:
+            subtree_key = (dir_path, prefix)
+            subtree_signature = (index.subtree_version(dir_path), matcher_key)
+            cached = cache.subtrees.get(subtree_key)
+            if cached is not None and cached[0] == subtree_signature:
+                lines.extend(cached[1])
+                return
+            start = len(lines)
+            list_entries(dir_path, prefix)
+            cache.subtrees[subtree_key] = (subtree_signature, lines[start:])
+        else:
+            list_entries(dir_path, prefix)
+
+    def list_entries(dir_path: str, prefix: str):
+        dirs, files = index.listdir(dir_path)
+        dir_names = set(dirs)
+        shown = expanded[dir_path]
+        names = sorted(dirs + files) if shown is None else sorted(shown)
+        for name in names:
+            new_prefix = prefix + indent_char
+            sub_path = os.path.join(dir_path, name)
+            if name not in dir_names:
+                lines.append(f"{new_prefix}{name}")
+            elif sub_path in expanded:
+                lines.append(f"{new_prefix}{name}/")
+                list_dir(sub_path, new_prefix)
+            else:
+                lines.append(f"{new_prefix}{summary(name, sub_path)}")
+        if shown is not None and len(shown) < len(dirs) + len(files):
+            lines.append(f"{prefix}{indent_char}... ({len(dirs) + len(files) - len(shown):,} more entries)")
+
+    list_dir(root_dir, "")
+    tree = "\n".join(lines)
+    cache.trees[root_dir] = (tree_key, signature, tree)
+    return tree
@@ -0,0 +1,195 @@
+import os
+import sys
+import errno
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+from typing import Callable, Dict, Iterable, Optional
+from loguru import logger
+from auto_coder_chat_lite.common.file_index import IndexChanges, ProjectFileIndex
+
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """
+    A minimal ctypes binding to the Linux inotify API.
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read_events(self, timeout: float):
+        """
+        Wait up to timeout seconds and return the pending (wd, mask, name) events.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """
+    Keep a ProjectFileIndex up to date in the background and report what changed.
+
+    On Linux every indexed directory is watched with inotify, and only the
+    directories that received create, delete or rename events are re-listed.
+    Elsewhere, or when inotify is unavailable or runs out of watches, the
+    index is refreshed by polling directory mtimes. The index is not saved
+    after every batch, only by the next refresh of a command and on stop.
+    """
+
+    def __init__(self, index: ProjectFileIndex, on_change: Callable[[IndexChanges], None],
+                 poll_interval: float = 2.0, debounce: float = 0.1):
+        """
+        Initialize the watcher.
+
+        :param index: The index to keep up to date. It must have been refreshed once.
+        :param on_change: Called from the watcher thread with the IndexChanges of each batch of events.
+        :param poll_interval: Seconds between two refreshes when polling.
+        :param debounce: Seconds to wait for more events before applying a batch.
+        """
+        self.index = index
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.backend = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[Inotify] = None
+        self._watches: Dict[int, str] = {}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = Inotify()
+                self._watch_dirs(dir_path for dir_path, _, _ in self.index.walk())
+                self.backend = "inotify"
+            except OSError as e:
+                logger.warning(f"inotify unavailable, falling back to polling: {e}")
+                self._close_inotify()
+        if self._inotify is None:
+            self.backend = "polling"
+        target = self._run_inotify if self._inotify is not None else self._run_polling
+        self._thread = threading.Thread(target=target, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._close_inotify()
+        self.index.flush()
+
+    def _close_inotify(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._watches.clear()
+
+    def _watch_dirs(self, dir_paths: Iterable[str]):
+        for dir_path in dir_paths:
+            try:
+                # A moved directory keeps its watch descriptor, so this also
+                # re-points the descriptor at the new path.
+                self._watches[self._inotify.add_watch(dir_path)] = dir_path
+            except OSError as e:
+                if e.errno not in (errno.ENOENT, errno.ENOTDIR):
+                    raise
+
+    def _notify(self, changes: IndexChanges):
+        if changes:
+            try:
+                self.on_change(changes)
+            except Exception as e:
+                logger.error(f"File watcher callback failed: {e}")
+
+    def _run_polling(self):
+        while not self._stop.wait(self.poll_interval):
+            changes = IndexChanges()
+            try:
+                self.index.refresh(self.index.matcher, changes, save=False)
+            except OSError as e:
+                logger.warning(f"File index refresh failed: {e}")
+                continue
+            self._notify(changes)
+
+    def _run_inotify(self):
+        while not self._stop.is_set():
+            events = self._inotify.read_events(0.5)
+            if not events:
+                continue
+            # Collect a burst of events (e.g. a checkout) into one batch.
+            while True:
+                more = self._inotify.read_events(self.debounce)
+                if not more:
+                    break
+                events.extend(more)
+            changes = IndexChanges()
+            overflow = any(mask & IN_Q_OVERFLOW for _, mask, _ in events)
+            if overflow:
+                self.index.refresh(self.index.matcher, changes, save=False)
+            else:
+                dirty_dirs = set()
+                for wd, mask, _ in events:
+                    if mask & IN_IGNORED:
+                        self._watches.pop(wd, None)
+                    elif wd in self._watches and mask & (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO):
+                        dirty_dirs.add(self._watches[wd])
+                self.index.update_dirs(dirty_dirs, changes)
+            try:
+                if overflow:
+                    self._watch_dirs(dir_path for dir_path, _, _ in self.index.walk())
+                else:
+                    self._watch_dirs(changes.added_dirs)
+            except OSError as e:
+                logger.warning(f"Too many directories to watch, falling back to polling: {e}")
+                self._close_inotify()
+                self.backend = "polling"
+                self._notify(changes)
+                self._run_polling()
+                return
+            self._notify(changes)
@@ -0,0 +1,174 @@
+import os
+import re
+import glob
+from weakref import WeakKeyDictionary
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from auto_coder_chat_lite.common.file_index import ProjectFileIndex
+
+# index -> (signature, file name -> sorted paths of the files with that name)
+_name_indexes: "WeakKeyDictionary[ProjectFileIndex, Tuple[tuple, Dict[str, List[str]]]]" = WeakKeyDictionary()
+
+
+def is_glob(pattern: str) -> bool:
+    return "*" in pattern or "?" in pattern
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translate a "/" separated glob pattern to a regular expression with the
+    semantics of glob.glob(pattern, recursive=True): wildcards do not cross
+    "/", "**" matches any number of directories, and wildcards do not match
+    names starting with a dot.
+
+    :param pattern: The glob pattern.
+    :return: A regular expression matching whole paths.
+    """
+    parts = pattern.split("/")
+    regex = ""
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        if part == "**":
+            regex += r"(?:(?!\.)[^/]*/)*" + (r"(?!\.)[^/]*" if last else "")
+            continue
+        if is_glob(part) and not part.startswith("."):
+            regex += r"(?!\.)"
+        j = 0
+        while j < len(part):
+            c = part[j]
+            j += 1
+            if c == "*":
+                regex += "[^/]*"
+            elif c == "?":
+                regex += "[^/]"
+            elif c == "[" and part.find("]", j) > j:
+                end = part.find("]", j)
+                chars = part[j:end].replace("\\", "\\\\")
+                if chars.startswith("!"):
+                    chars = "^" + chars[1:]
+                regex += f"[{chars}]"
+                j = end + 1
+            else:
+                regex += re.escape(c)
+        if not last:
+            regex += "/"
+    return regex
+
+
+def resolve_patterns(index: ProjectFileIndex, patterns: Iterable[str], cwd: Optional[str] = None) -> List[str]:
+    """
+    Resolve the file patterns of one command in a single pass over the project index.
+
+    Glob patterns match like glob.glob relative to cwd, and are compiled into one
+    regular expression. A plain pattern matches the files with that exact name,
+    or, in directories without one, the files whose absolute path starts with
+    the absolute pattern. Plain patterns that match nothing are returned as is, so
+    files outside the project can still be referenced.
+
+    :param index: The refreshed index of the project.
+    :param patterns: The file names, paths or glob patterns.
+    :param cwd: The directory relative patterns are resolved against, defaults to os.getcwd().
+    :return: The matched file paths without duplicates.
+    """
+    cwd = cwd or os.getcwd()
+    root_prefix = os.path.join(index.root_dir, "")
+    globs, outside_globs, plain = [], [], []
+    for pattern in dict.fromkeys(patterns):
+        if is_glob(pattern):
+            abs_pattern = os.path.normpath(os.path.join(cwd, pattern))
+            if abs_pattern.startswith(root_prefix):
+                globs.append(glob_to_regex(abs_pattern.replace(os.sep, "/")))
+            else:
+                outside_globs.append(pattern)
+        else:
+            plain.append(pattern)
+
+    matched: Dict[str, None] = {}
+    glob_matcher = re.compile("|".join(f"(?:{regex})" for regex in globs)) if globs else None
+    abs_patterns = {pattern: os.path.abspath(os.path.join(cwd, pattern)) for pattern in plain}
+    # Indexed paths all start with the root, so an absolute pattern can only
+    # occur in them as a prefix: one startswith call rejects most paths.
+    plain_prefixes = tuple(set(abs_patterns.values()))
+    plain_names = set(plain)
+    found = set()
+
+    if glob_matcher or plain:
+        for dir_path, _, files in index.walk():
+            prefix = os.path.join(dir_path, "")
+            exact = plain_names.intersection(files) if plain else ()
+            for pattern in exact:
+                matched[prefix + pattern] = None
+                found.add(pattern)
+            for name in files:
+                path = prefix + name
+                if glob_matcher and glob_matcher.fullmatch(path.replace(os.sep, "/")):
+                    matched[path] = None
+                if plain and path.startswith(plain_prefixes):
+                    for pattern, abs_pattern in abs_patterns.items():
+                        if pattern not in exact and path.startswith(abs_pattern):
+                            matched[path] = None
+                            found.add(pattern)
+
+    for pattern in outside_globs:
+        for file_path in glob.glob(os.path.join(cwd, pattern), recursive=True):
+            if os.path.isfile(file_path):
+                matched[os.path.abspath(file_path)] = None
+    for pattern in plain:
+        if pattern not in found:
+            matched[pattern] = None
+    return list(matched)
+
+
+def file_name_index(index: ProjectFileIndex) -> Dict[str, List[str]]:
+    """
+    Map the file names of the project to the paths of the files with that name.
+
+    The map is built in one walk of the index and reused until a listing or
+    the exclude rules change.
+
+    :param index: The refreshed index of the project.
+    :return: The file name -> sorted absolute paths map, it must not be modified.
+    """
+    signature = (index.generation, id(index.matcher), index.matcher.version)
+    cached = _name_indexes.get(index)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    names: Dict[str, List[str]] = {}
+    for dir_path, _, files in index.walk():
+        prefix = os.path.join(dir_path, "")
+        for name in files:
+            names.setdefault(name, []).append(prefix + name)
+    for paths in names.values():
+        paths.sort()
+    _name_indexes[index] = (signature, names)
+    return names
+
+
+class MentionResolution(NamedTuple):
+    # The files of all the mentions, without duplicates.
+    files: List[str]
+    # The mentioned names that match more than one file, with their paths.
+    ambiguous: Dict[str, List[str]]
+    # The mentioned names that match no file.
+    missing: List[str]
+
+
+def resolve_mentions(index: ProjectFileIndex, names: Iterable[str]) -> MentionResolution:
+    """
+    Resolve the @name.ext mentions of a query with dictionary lookups in the file name index.
+
+    :param index: The refreshed index of the project.
+    :param names: The mentioned file names.
+    :return: The MentionResolution of the names.
+    """
+    name_index = file_name_index(index)
+    files: Dict[str, None] = {}
+    ambiguous, missing = {}, []
+    for name in dict.fromkeys(names):
+        paths = name_index.get(name)
+        if not paths:
+            missing.append(name)
+            continue
+        if len(paths) > 1:
+            ambiguous[name] = paths
+        files.update(dict.fromkeys(paths))
+    return MentionResolution(list(files), ambiguous, missing)
@@ -0,0 +1,71 @@
+import hashlib
+from typing import Dict, List, Tuple
+
+# Prompts are compared in blocks of this many characters, roughly the
+# granularity at which providers extend a cached prefix.
+PREFIX_BLOCK_SIZE = 512
+
+
+class PromptCacheLayout:
+    """
+    Track consecutive prompts to lay them out for server-side prefix caching.
+
+    Providers with prompt caching reuse the longest prefix a request shares
+    with a recent one. split_files keeps the files that did not change since
+    the previous prompt in a stable, sorted order ahead of the changed ones,
+    and measure reports how much of a prompt repeats the previous prompt's prefix.
+    """
+
+    def __init__(self):
+        self._file_digests: Dict[str, str] = {}
+        self._prefix_digests: List[bytes] = []
+
+    def split_files(self, contents: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """
+        Split the files of a prompt into the unchanged and the changed ones.
+
+        A file is changed if its content differs from the previous prompt, or
+        if it is new while there was a previous prompt.
+
+        :param contents: The (file_path, file_code) of the files of the prompt.
+        :return: The unchanged files sorted by path, and the changed files in their given order.
+        """
+        digests = {file_path: hashlib.sha1(file_code.encode("utf-8")).hexdigest() for file_path, file_code in contents}
+        unchanged, changed = [], []
+        for file_path, file_code in contents:
+            previous = self._file_digests.get(file_path)
+            if previous == digests[file_path] or (previous is None and not self._file_digests):
+                unchanged.append((file_path, file_code))
+            else:
+                changed.append((file_path, file_code))
+        self._file_digests = digests
+        unchanged.sort()
+        return unchanged, changed
+
+    def measure(self, file_path: str) -> Tuple[int, int]:
+        """
+        Compare a rendered prompt file with the previous one measured.
+
+        Only the digests of the prompt's prefixes are kept, not the prompt itself.
+
+        :param file_path: The file the prompt was rendered to.
+        :return: The number of leading characters shared with the previous prompt, and the total.
+        """
+        digest = hashlib.sha1()
+        digests = []
+        shared = total = 0
+        matching = True
+        with open(file_path, encoding="utf-8") as f:
+            while True:
+                block = f.read(PREFIX_BLOCK_SIZE)
+                if not block:
+                    break
+                digest.update(block.encode("utf-8"))
+                digests.append(digest.digest())
+                total += len(block)
+                matching = matching and len(digests) <= len(self._prefix_digests) \
+                    and self._prefix_digests[len(digests) - 1] == digests[-1]
+                if matching:
+                    shared = total
+        self._prefix_digests = digests
+        return shared, total
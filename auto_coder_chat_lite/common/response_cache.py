@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import List, Optional
+
+# The total size of the cached responses.
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Responses older than this are not replayed.
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+class ResponseCache:
+    """
+    A content-addressed, on-disk cache of LLM responses.
+
+    Responses are keyed by a fingerprint of the model, the messages and the
+    request parameters, and stored as the list of their streamed chunks, so a
+    cached stream can be replayed chunk by chunk. Entries expire after ttl
+    seconds; the file modification time is refreshed on every hit, and the
+    least recently used entries are removed once the cache grows over max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL):
+        """
+        Initialize the cache.
+
+        :param cache_dir: The directory of the cache files, created on the first put.
+        :param max_bytes: The maximum total size of the cache files.
+        :param ttl: The number of seconds a response is replayed for.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(model: str, messages: List[dict], params: dict) -> str:
+        """
+        Return the cache key of a request.
+
+        :param model: The model of the request.
+        :param messages: The messages of the request.
+        :param params: The other parameters that change the response, such as max_tokens.
+        :return: The hex sha256 of the request.
+        """
+        request = json.dumps({"model": model, "messages": messages, "params": params},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """
+        Return the chunks of a cached response.
+
+        :param key: The fingerprint of the request.
+        :return: The chunks, or None if the response is not cached or expired.
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["chunks"]
+
+    def put(self, key: str, chunks: List[str]):
+        """
+        Store the chunks of a response, then evict the least recently used entries over max_bytes.
+
+        :param key: The fingerprint of the request.
+        :param chunks: The chunks of the response.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so a reader never sees a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"created": time.time(), "chunks": chunks}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove expired entries, and the least recently used ones while the cache is over max_bytes.
+        """
+        with self._lock:
+            entries = []
+            now = time.time()
+            for dir_entry in os.scandir(self.cache_dir) if os.path.isdir(self.cache_dir) else ():
+                if not dir_entry.is_dir():
+                    continue
+                for entry in os.scandir(dir_entry.path):
+                    if not entry.name.endswith(".json"):
+                        continue
+                    st = entry.stat()
+                    # A hit refreshes the mtime, so an entry untouched for ttl has expired too.
+                    if now - st.st_mtime > self.ttl:
+                        self._remove(entry.path)
+                    else:
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
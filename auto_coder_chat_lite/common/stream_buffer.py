@@ -0,0 +1,76 @@
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+
+class StreamBuffer:
+    """
+    Accumulate a streamed LLM response in time linear in its length.
+
+    Chunks are appended to a list and only joined once, by text. Next to
+    them, a ring of the last max_lines lines is kept up to date chunk by
+    chunk, so showing the tail of the response never rescans what came before.
+    """
+
+    def __init__(self, max_lines: int):
+        """
+        Initialize the buffer.
+
+        :param max_lines: The number of trailing lines kept for display, at least 1.
+        """
+        self._chunks: List[str] = []
+        self._lines = deque(maxlen=max(max_lines - 1, 0))
+        self._partial = ""
+        self._text: Optional[str] = ""
+        self.line_count = 0
+
+    def append(self, chunk: str):
+        """
+        Append a chunk of the response.
+        """
+        if not chunk:
+            return
+        self._chunks.append(chunk)
+        self._text = None
+        parts = chunk.split("\n")
+        self._partial += parts[0]
+        for part in parts[1:]:
+            self._lines.append(self._partial)
+            self._partial = part
+            self.line_count += 1
+
+    def tail(self) -> str:
+        """
+        Return the last max_lines lines of the response.
+        """
+        return "\n".join([*self._lines, self._partial])
+
+    def text(self) -> str:
+        """
+        Return the whole response.
+        """
+        if self._text is None:
+            self._text = "".join(self._chunks)
+            self._chunks = [self._text]
+        return self._text
+
+
+class Throttle:
+    """
+    Let an action run at most a given number of times per second.
+    """
+
+    def __init__(self, per_second: float, clock: Callable[[], float] = time.monotonic):
+        self.interval = 1 / per_second
+        self.clock = clock
+        self._last = None
+
+    def ready(self) -> bool:
+        """
+        Return True, and start a new interval, if the last interval has passed.
+        """
+        now = self.clock()
+        if self._last is not None and now - self._last < self.interval:
+            return False
+        self._last = now
+        return True
@@ -0,0 +1,218 @@
+import os
+import re
+import ast
+from typing import Iterable, List, Optional, Set
+
+# Matches the head of a top-level Hy definition and captures its name.
+HY_DEFINITION = re.compile(r"\(\s*(defn/a|defn|defmacro|defclass|defmain)\s+(?:\^\S+\s+)?([^\s\[\](){}]+)")
+# Matches a function, class or method declaration of a brace delimited language.
+BRACE_DECLARATION = re.compile(
+    r"^\s*(?:(?:export|default|public|private|protected|internal|static|async|abstract|final|override|virtual)\s+)*"
+    r"(?:(?P<kind>class|interface|struct|function\*?|func|fn)\s+(?:\([^)]*\)\s*)?(?P<name>\w+)"
+    r"|(?P<method>\w+)\s*\([^;]*\)\s*(?::\s*[\w<>\[\], .]+)?\s*\{)"
+)
+# Words that look like a method declaration in a brace language but are not.
+BRACE_KEYWORDS = {"if", "for", "while", "switch", "catch", "return", "function", "else", "do", "try", "with"}
+BRACE_EXTENSIONS = {".js", ".jsx", ".ts", ".tsx", ".java", ".go", ".rs", ".c", ".h", ".cc", ".cpp", ".hpp",
+                    ".cs", ".kt", ".swift", ".scala", ".php"}
+PLACEHOLDER = "..."
+
+
+def query_identifiers(query: str) -> Set[str]:
+    """
+    Return the identifiers a query refers to, lowercased: its @symbol mentions
+    and every identifier-like word of at least three characters.
+
+    :param query: The user's coding query.
+    :return: The lowercased identifiers.
+    """
+    return {word.lower() for word in re.findall(r"[A-Za-z_][\w-]{2,}", query)}
+
+
+def _relevant(name: str, wanted: Set[str]) -> bool:
+    return name.lower() in wanted
+
+
+def _start_line(node: ast.stmt) -> int:
+    """
+    Return the index of the first line of a statement, including its decorators.
+    """
+    return min([d.lineno for d in getattr(node, "decorator_list", [])] + [node.lineno]) - 1
+
+
+def _python_outline(code: str, wanted: Set[str]) -> Optional[str]:
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    lines = code.splitlines(keepends=True)
+
+    def render(nodes: List[ast.stmt], start: int, end: int) -> List[str]:
+        out = []
+        cursor = start
+        for node in nodes:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            node_start = _start_line(node)
+            out.extend(lines[cursor:node_start])
+            cursor = node.end_lineno
+            body_start = _start_line(node.body[0])
+            if _relevant(node.name, wanted) or body_start < node.lineno:
+                out.extend(lines[node_start:node.end_lineno])
+                continue
+            # Skip the docstring, it is only worth its tokens for relevant symbols.
+            body = node.body
+            if isinstance(body[0], ast.Expr) and isinstance(getattr(body[0], "value", None), ast.Constant) \
+                    and isinstance(body[0].value.value, str):
+                body = body[1:]
+            out.extend(lines[node_start:body_start])
+            if isinstance(node, ast.ClassDef):
+                members = render(body, _start_line(body[0]), node.end_lineno) if body else []
+                if any(line.strip() for line in members):
+                    out.extend(members)
+                    continue
+            indent = " " * node.body[0].col_offset
+            out.append(f"{indent}{PLACEHOLDER}\n")
+        out.extend(lines[cursor:end])
+        return out
+
+    return "".join(render(tree.body, 0, len(lines)))
+
+
+def _form_end(code: str, start: int) -> int:
+    """
+    Return the index after the Hy form, vector or string starting at start.
+    """
+    depth = 0
+    i = start
+    while i < len(code):
+        c = code[i]
+        if c == '"':
+            i += 1
+            while i < len(code) and code[i] != '"':
+                i += 2 if code[i] == "\\" else 1
+        elif c == ";":
+            while i < len(code) and code[i] != "\n":
+                i += 1
+            continue
+        elif c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(code)
+
+
+def _hy_outline(code: str, wanted: Set[str]) -> str:
+    out = []
+    cursor = 0
+    i = 0
+    while i < len(code):
+        c = code[i]
+        if c == ";":
+            i = code.find("\n", i)
+            if i < 0:
+                break
+        elif c == '"':
+            i = _form_end(code, i)
+            continue
+        elif c == "(":
+            end = _form_end(code, i)
+            match = HY_DEFINITION.match(code, i)
+            if match and not _relevant(match.group(2), wanted):
+                # Keep the head up to the parameter (or base class) vector.
+                vector = code.find("[", match.end(), end)
+                head_end = _form_end(code, vector) if vector >= 0 else match.end()
+                out.append(code[cursor:head_end] + f" {PLACEHOLDER})")
+                cursor = end
+            i = end
+            continue
+        i += 1
+    out.append(code[cursor:])
+    return "".join(out)
+
+
+def _block_end(lines: List[str], start: int) -> Optional[int]:
+    """
+    Return the index of the line closing the brace block opened on or after start.
+    """
+    depth = 0
+    opened = False
+    for index in range(start, len(lines)):
+        line = lines[index]
+        quote = None
+        i = 0
+        while i < len(line):
+            c = line[i]
+            if quote:
+                if c == "\\":
+                    i += 1
+                elif c == quote:
+                    quote = None
+            elif c in "\"'`":
+                quote = c
+            elif line.startswith("//", i):
+                break
+            elif c == "{":
+                depth += 1
+                opened = True
+            elif c == "}":
+                depth -= 1
+                if opened and depth == 0:
+                    return index
+            i += 1
+        if not opened and index > start + 2:
+            return None
+    return None
+
+
+def _brace_outline(lines: List[str], wanted: Set[str]) -> List[str]:
+    out = []
+    i = 0
+    while i < len(lines):
+        match = BRACE_DECLARATION.match(lines[i])
+        name = match and (match.group("name") or match.group("method"))
+        end = _block_end(lines, i) if name and name not in BRACE_KEYWORDS else None
+        if end is None or end == i or _relevant(name, wanted):
+            out.extend(lines[i:end + 1] if end is not None else lines[i:i + 1])
+            i = end + 1 if end is not None else i + 1
+            continue
+        body_start = next(j for j in range(i, end + 1) if "{" in lines[j]) + 1
+        out.extend(lines[i:body_start])
+        if match.group("kind") in ("class", "interface", "struct"):
+            out.extend(_brace_outline(lines[body_start:end], wanted))
+        else:
+            indent = re.match(r"\s*", lines[i]).group()
+            out.append(f"{indent}    {PLACEHOLDER}\n")
+        out.append(lines[end])
+        i = end + 1
+    return out
+
+
+def extract_relevant(file_path: str, code: str, wanted: Iterable[str]) -> str:
+    """
+    Reduce a source file to the symbols relevant to a query.
+
+    Classes and functions whose name is wanted are kept whole; the others are
+    reduced to their signatures with a "..." body, and classes keep the
+    signatures of their members. Code outside definitions is kept as is.
+    Python is parsed with ast, Hy and brace delimited languages with a light
+    bracket matching parser; other files, and files that do not parse, are
+    returned unchanged.
+
+    :param file_path: The path of the file, its extension selects the parser.
+    :param code: The source code.
+    :param wanted: The lowercased identifiers the query refers to.
+    :return: The reduced source code.
+    """
+    wanted = set(wanted)
+    extension = os.path.splitext(file_path)[1]
+    if extension == ".py":
+        return _python_outline(code, wanted) or code
+    if extension == ".hy":
+        return _hy_outline(code, wanted)
+    if extension in BRACE_EXTENSIONS:
+        return "".join(_brace_outline(code.splitlines(keepends=True), wanted))
+    return code
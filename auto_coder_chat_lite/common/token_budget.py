@@ -0,0 +1,148 @@
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Shrinks a section to at most the given number of tokens, "" drops it.
+Shrinker = Callable[[str, int], str]
+
+_tokenizer: Optional[Callable[[str], int]] = None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of LLM tokens of a text, at four characters per token.
+    """
+    return (len(text) + 3) // 4
+
+
+def set_tokenizer(count_tokens: Optional[Callable[[str], int]]):
+    """
+    Set the function used to count the tokens of prompts.
+
+    :param count_tokens: Returns the number of tokens of a text, or None to use the default.
+    """
+    global _tokenizer
+    _tokenizer = count_tokens
+
+
+def get_tokenizer() -> Callable[[str], int]:
+    """
+    Return the function used to count the tokens of prompts.
+
+    This is the one set with set_tokenizer, else the cl100k_base encoding if
+    tiktoken is installed, else the estimate_tokens heuristic.
+    """
+    global _tokenizer
+    if _tokenizer is None:
+        if tiktoken is not None:
+            encoding = tiktoken.get_encoding("cl100k_base")
+            _tokenizer = lambda text: len(encoding.encode(text, disallowed_special=()))
+        else:
+            _tokenizer = estimate_tokens
+    return _tokenizer
+
+
+def truncate_text(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> str:
+    """
+    Keep the leading lines of a text that fit in max_tokens, followed by a marker.
+
+    :param text: The text to shorten.
+    :param max_tokens: The maximum number of tokens of the result.
+    :param count_tokens: Counts the tokens of a text.
+    :return: The shortened text, or "" if not even the marker fits.
+    """
+    marker = "\n... [truncated to fit the context token limit]"
+    available = max_tokens - count_tokens(marker)
+    if available <= 0:
+        return ""
+    # Estimate the cut from the average token length, then back off until it fits.
+    tokens = count_tokens(text)
+    end = len(text) * available // max(tokens, 1)
+    while end > 0:
+        head = text[:text.rfind("\n", 0, end) + 1] or text[:end]
+        if count_tokens(head) <= available:
+            return head + marker
+        end = len(head) * 9 // 10
+    return ""
+
+
+class PromptSection:
+    def __init__(self, name: str, text: str, priority: int, tokens: int, shrink: Optional[Shrinker]):
+        self.name = name
+        self.text = text
+        self.priority = priority
+        self.tokens = tokens
+        self.shrink = shrink
+        self.note = ""
+
+
+class ContextBudget:
+    """
+    Account for the tokens of the parts of a prompt and fit them into a limit.
+
+    Every section has a priority. When the total is over the limit, sections
+    are shrunk starting from the lowest priority, and among equal priorities
+    from the last one added, until the prompt fits. Sections without a
+    shrink function are never changed.
+    """
+
+    def __init__(self, limit: int = 0, count_tokens: Optional[Callable[[str], int]] = None):
+        """
+        Initialize the budget.
+
+        :param limit: The maximum number of tokens of the prompt, 0 for no limit.
+        :param count_tokens: Counts the tokens of a text, defaults to get_tokenizer().
+        """
+        self.limit = limit
+        self.count_tokens = count_tokens or get_tokenizer()
+        self.sections: List[PromptSection] = []
+
+    def add(self, name: str, text: str, priority: int = 0, shrink: Optional[Shrinker] = None) -> PromptSection:
+        """
+        Add a part of the prompt.
+
+        :param name: The name shown in the breakdown.
+        :param text: The text of the part.
+        :param priority: Sections with a lower priority are shrunk first.
+        :param shrink: Returns the text shrunk to a number of tokens, "" to drop it.
+        :return: The added section, whose text is updated by fit.
+        """
+        section = PromptSection(name, text, priority, self.count_tokens(text), shrink)
+        self.sections.append(section)
+        return section
+
+    @property
+    def total(self) -> int:
+        return sum(section.tokens for section in self.sections)
+
+    def fit(self) -> bool:
+        """
+        Shrink the lowest priority sections until the total fits the limit.
+
+        :return: True if the prompt fits.
+        """
+        if not self.limit:
+            return True
+        order = sorted(range(len(self.sections)), key=lambda i: (self.sections[i].priority, -i))
+        for i in order:
+            over = self.total - self.limit
+            if over <= 0:
+                break
+            section = self.sections[i]
+            if section.shrink is None or not section.tokens:
+                continue
+            tokens = section.tokens
+            text = section.shrink(section.text, max(tokens - over, 0))
+            section.text = text
+            section.tokens = self.count_tokens(text) if text else 0
+            section.note = "dropped" if not text else f"shrunk from {tokens:,}"
+        return self.total <= self.limit
+
+    def breakdown(self) -> List[Tuple[str, int, str]]:
+        """
+        Return the (name, tokens, note) of every section.
+        """
+        return [(section.name, section.tokens, section.note) for section in self.sections]
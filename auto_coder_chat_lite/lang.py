@@ -39,6 +39,8 @@ LANG = {
         'merge_completed': "Code merge completed",
         'confirm_merge': "Confirm merge? (A)ll/(Y)es/(N)o/A(b)ort: ",
         'merge_operation_aborted': "Merge operation aborted.",
+        'new_help': "  \033[94m/new\033[0m - \033[92mStart a new conversation, the next request sends every file in full (see /conf multi_turn)\033[0m",
+        'conversation_started': "Started a new conversation.",
     },
     'zh': {
         'help_message': "\033[1m支持的命令：\033[0m",
@@ -74,6 +76,8 @@ LANG = {
         'merge_completed': "代码合并完成",
         'confirm_merge': "是否合并? (A)ll/(Y)es/(N)o/A(b)ort: ",
         'merge_operation_aborted': "合并操作已中止。",
+        'new_help': "  \033[94m/new\033[0m - \033[92m开始新的对话，下一次请求将发送完整的文件（见 /conf multi_turn）\033[0m",
+        'conversation_started': "已开始新的对话。",
     }
 }
 
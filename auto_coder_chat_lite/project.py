@@ -1,15 +1,17 @@
 import os
 import copy
 import json
-from typing import List
+from typing import List, NamedTuple
 from auto_coder_chat_lite.constants import (
     PROJECT_DIR_NAME,
     defaut_exclude_dirs,
     memory,
     PROJECT_ROOT,
-    GITIGNORE_FILE
+    GITIGNORE_FILE,
+    SCAN_WORKERS
 )
 from auto_coder_chat_lite.lib.logger import setup_logger
+from auto_coder_chat_lite.common.file_index import ProjectFileIndex, get_file_index
 
 logger = setup_logger(__name__)
 def init_project():
@@ -46,37 +48,63 @@ def init_project():
         with open(gitignore_path, "w", encoding='utf-8') as f:
             f.write(content)
 
+def get_project_index(root_dir: str = None) -> ProjectFileIndex:
+    """
+    Return the refreshed file index of a root directory.
+
+    Its matcher is compiled from the exclude dirs and the .gitignore files of
+    the tree, and is only rebuilt when one of them changes. Directories are
+    listed on scan_workers threads.
+
+    :param root_dir: The directory to index, defaults to PROJECT_ROOT.
+    :return: The up to date ProjectFileIndex.
+    """
+    final_exclude_dirs = defaut_exclude_dirs + memory.get("exclude_dirs", [])
+    workers = memory.get("conf", {}).get(SCAN_WORKERS, 1)
+    return get_file_index(root_dir or PROJECT_ROOT, final_exclude_dirs, workers)
+
+class ProjectFiles(NamedTuple):
+    file_names: List[str]
+    files: List[str]
+    files_with_dot: List[str]
+    dir_names: List[str]
+
+def get_project_files() -> ProjectFiles:
+    """
+    Collect the file names, absolute paths, dot-relative paths and directory
+    names of the project in a single pass over the file index.
+
+    :return: A ProjectFiles tuple.
+    """
+    project_files = ProjectFiles([], [], [], [])
+    for root, dirs, files in get_project_index().walk():
+        dot_root = root.replace(PROJECT_ROOT, ".")
+        project_files.file_names.extend(files)
+        project_files.dir_names.extend(dirs)
+        for file in files:
+            project_files.files.append(os.path.join(root, file))
+            project_files.files_with_dot.append(os.path.join(dot_root, file))
+    return project_files
+
 def get_all_file_names_in_project() -> List[str]:
     file_names = []
-    final_exclude_dirs = defaut_exclude_dirs + memory.get("exclude_dirs", [])
-    for root, dirs, files in os.walk(PROJECT_ROOT):
-        dirs[:] = [d for d in dirs if d not in final_exclude_dirs]
+    for root, dirs, files in get_project_index().walk():
         file_names.extend(files)
     return file_names
 
 def get_all_file_in_project() -> List[str]:
-    file_names = []
-    final_exclude_dirs = defaut_exclude_dirs + memory.get("exclude_dirs", [])
-    for root, dirs, files in os.walk(PROJECT_ROOT):
-        dirs[:] = [d for d in dirs if d not in final_exclude_dirs]
-        for file in files:
-            file_names.append(os.path.join(root, file))
-    return file_names
+    return get_project_index().files()
 
 def get_all_file_in_project_with_dot() -> List[str]:
     file_names = []
-    final_exclude_dirs = defaut_exclude_dirs + memory.get("exclude_dirs", [])
-    for root, dirs, files in os.walk(PROJECT_ROOT):
-        dirs[:] = [d for d in dirs if d not in final_exclude_dirs]
+    for root, dirs, files in get_project_index().walk():
         for file in files:
             file_names.append(os.path.join(root, file).replace(PROJECT_ROOT, "."))
     return file_names
 
 def get_all_dir_names_in_project() -> List[str]:
     dir_names = []
-    final_exclude_dirs = defaut_exclude_dirs + memory.get("exclude_dirs", [])
-    for root, dirs, files in os.walk(PROJECT_ROOT):
-        dirs[:] = [d for d in dirs if d not in final_exclude_dirs]
+    for root, dirs, files in get_project_index().walk():
         for dir in dirs:
             dir_names.append(dir)
-    return dir_names
\ No newline at end of file
+    return dir_names
@@ -0,0 +1,92 @@
+"""
+Compare the serial os.walk traversal with the file index, serial and on a thread pool.
+
+Usage:
+    python -m benchmarks.bench_scan [--root DIR] [--workers 1 4 8] [--repeat 3]
+
+Without --root a synthetic tree is generated in a temporary directory.
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from auto_coder_chat_lite.common.file_index import ProjectFileIndex
+
+EXCLUDE_DIRS = [".git/", "node_modules/", "dist/", "build/", "__pycache__/"]
+
+
+def make_tree(root: str, depth: int, fanout: int, files_per_dir: int):
+    """Create a synthetic tree of fanout**depth leaf directories."""
+    dirs = [root]
+    for _ in range(depth):
+        next_dirs = []
+        for parent in dirs:
+            for i in range(fanout):
+                path = os.path.join(parent, f"dir{i}")
+                os.mkdir(path)
+                next_dirs.append(path)
+        dirs = next_dirs
+    for dir_path in dirs:
+        for i in range(files_per_dir):
+            open(os.path.join(dir_path, f"file{i}.py"), "w").close()
+    # Age the directories so the index does not treat them as just modified.
+    past = time.time() - 60
+    for dir_path, _, _ in os.walk(root):
+        os.utime(dir_path, (past, past))
+
+
+def serial_walk(root: str) -> int:
+    """The traversal project.py used before the file index."""
+    exclude_dirs = [d.strip("/") for d in EXCLUDE_DIRS]
+    count = 0
+    for _, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        count += len(files)
+    return count
+
+
+def index_scan(root: str, workers: int) -> int:
+    index = ProjectFileIndex(root, workers=workers)
+    index.refresh(EXCLUDE_DIRS)
+    return len(index.files())
+
+
+def bench(label: str, func, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<32} {best * 1000:>10.1f} ms  ({count} files)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark project traversal")
+    parser.add_argument("--root", help="Directory to scan (default: a generated tree)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16], help="Pool sizes to compare")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the best one is reported")
+    parser.add_argument("--depth", type=int, default=3, help="Depth of the generated tree")
+    parser.add_argument("--fanout", type=int, default=10, help="Sub directories per generated directory")
+    parser.add_argument("--files", type=int, default=20, help="Files per generated leaf directory")
+    args = parser.parse_args()
+
+    root = args.root
+    temp_dir = None
+    if root is None:
+        temp_dir = root = tempfile.mkdtemp(prefix="bench_scan_")
+        make_tree(root, args.depth, args.fanout, args.files)
+    try:
+        bench("os.walk (serial)", lambda: serial_walk(root), args.repeat)
+        for workers in args.workers:
+            bench(f"index cold scan, {workers} worker(s)", lambda: index_scan(root, workers), args.repeat)
+        index = ProjectFileIndex(root)
+        index.refresh(EXCLUDE_DIRS)
+        bench("index warm refresh", lambda: index.refresh(EXCLUDE_DIRS) or len(index.files()), args.repeat)
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import time
+import asyncio
+import httpx
+import openai
+import pytest
+from types import SimpleNamespace
+from auto_coder_chat_lite.lib import agent
+from auto_coder_chat_lite.common.response_cache import ResponseCache
+
+@pytest.fixture
+def config_manager(tmpdir, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmpdir))
+    monkeypatch.setattr(agent, "_clients", {})
+    monkeypatch.setattr(agent, "_config_cache", [None, None, None])
+    return agent.initialize_config_manager()
+
+def test_load_config_reloads_on_change(config_manager):
+    """Test that the config file is only read again once it changed."""
+    config_manager.save({"base-url": "http://localhost:1", "api-key": "a", "model": "m"})
+    config = agent.load_config()
+    assert agent.load_config() is config
+
+    config_manager.save({"base-url": "http://localhost:1", "api-key": "b", "model": "m"})
+    later = time.time() + 5
+    os.utime(config_manager.config_file_path, (later, later))
+    assert agent.load_config()["api-key"] == "b"
+
+def test_pooled_clients_are_shared(config_manager):
+    """Test that clients are reused per base url and api key."""
+    config = {"base-url": "http://localhost:1", "api-key": "a", "model": "m"}
+    client = agent.get_pooled_client(config)
+    assert agent.get_pooled_client(dict(config)) is client
+    assert agent.get_pooled_client({**config, "api-key": "b"}) is not client
+
+class FakeStream:
+    def __init__(self, chunks, delay=0):
+        self.chunks = chunks
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+class FakeClient:
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        self.streams.append(outcome)
+        return outcome
+
+@pytest.fixture
+def fake_client(config_manager, monkeypatch):
+    config_manager.save({"base-url": "http://localhost:1", "api-key": "a", "model": "m",
+                         "first-token-timeout": 0.5, "idle-timeout": 0.2})
+    monkeypatch.setattr(agent, "retry_delay", lambda attempt: 0)
+    def install(outcomes):
+        client = FakeClient(outcomes)
+        monkeypatch.setattr(agent, "get_pooled_client", lambda config: client)
+        return client
+    return install
+
+def test_stream_retries_before_first_chunk(fake_client):
+    """Test that retryable errors and a slow first chunk are retried."""
+    client = fake_client([openai.APIConnectionError(request=httpx.Request("POST", "http://localhost:1")),
+                          FakeStream(["late"], delay=1), FakeStream(["a", "b"])])
+    response = agent.external_chat_completion([], stream=True)
+    assert list(response) == ["a", "b"]
+    assert [stream.closed for stream in client.streams] == [True, True]
+
+def test_stream_idle_timeout_after_first_chunk(fake_client):
+    """Test that a stalled stream raises instead of retrying once chunks were received."""
+    client = fake_client([FakeStream(["a", "b"], delay=0.3)])
+    response = agent.external_chat_completion([], stream=True)
+    with pytest.raises(asyncio.TimeoutError):
+        list(response)
+    assert client.streams[0].closed
+
+def test_closing_the_stream_cancels_the_request(fake_client):
+    """Test that closing the response closes the HTTP stream."""
+    client = fake_client([FakeStream(["a"] + ["b"] * 100, delay=0.01)])
+    response = agent.external_chat_completion([], stream=True)
+    assert next(response) == "a"
+    response.close()
+    assert client.streams[0].closed
+
+def test_response_cache_replays_streams(fake_client, tmpdir):
+    """Test that a completed stream is cached and replayed chunk by chunk."""
+    cache = ResponseCache(str(tmpdir.join("response_cache")))
+    chunk = lambda text: SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+    client = fake_client([FakeStream([chunk("a"), chunk("b")])])
+    messages = [{"role": "user", "content": "hi"}]
+    assert [c.choices[0].delta.content for c in agent.external_chat_completion(messages, stream=True, cache=cache)] == ["a", "b"]
+
+    replayed = agent.external_chat_completion(messages, stream=True, cache=cache)
+    assert [c.choices[0].delta.content for c in replayed] == ["a", "b"]
+    assert agent.external_chat_completion(messages, cache=cache).choices[0].message.content == "ab"
+    assert client.outcomes == []
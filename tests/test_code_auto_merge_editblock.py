@@ -1,5 +1,5 @@
 import unittest
-from auto_coder_chat_lite.common.code_auto_merge_editblock import CodeAutoMergeEditBlock, PathAndCode
+from auto_coder_chat_lite.common.code_auto_merge_editblock import CodeAutoMergeEditBlock, EditBlockStream, PathAndCode
 from auto_coder_chat_lite.common import AutoCoderArgs
 import os
 import tempfile
@@ -72,5 +72,25 @@ class TestCodeAutoMergeEditBlock(unittest.TestCase):
         
         self.assertEqual(updated_content, "new_content")
 
+    def test_edit_block_stream(self):
+        with open(self.file_path, "w") as f:
+            f.write("first_line\nsecond_line\n")
+        content = (
+            "Some text\n"
+            + self.generate_search_replace(self.file_path, "first_line", "first")
+            + self.generate_search_replace(os.path.join(self.temp_dir, "new.py"), "", "created")
+            + self.generate_search_replace(self.file_path, "missing block\nof text", "x")
+        )
+
+        # Feed the response in small chunks, like a stream.
+        stream = EditBlockStream(self.code_auto_merge_editblock)
+        for i in range(0, len(content), 5):
+            stream.feed(content[i:i + 5])
+        unmatched = stream.close()
+
+        self.assertEqual(stream.blocks, self.code_auto_merge_editblock.get_edits(content))
+        self.assertEqual([block[:3] for block in unmatched], [(self.file_path, "missing block\nof text", "x")])
+        self.assertEqual(len(self.code_auto_merge_editblock.matches), 1)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
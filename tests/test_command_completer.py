@@ -0,0 +1,65 @@
+import threading
+from prompt_toolkit.document import Document
+from auto_coder_chat_lite import command_completer
+from auto_coder_chat_lite.command_completer import CommandCompleter
+from auto_coder_chat_lite.common.file_index import IndexChanges
+from auto_coder_chat_lite.project import ProjectFiles
+
+def completions(completer, text):
+    return [c.text for c in completer.get_completions(Document(text), None)]
+
+def test_completes_commands_before_files_are_loaded(monkeypatch):
+    """Test that the completer loads files in the background and degrades until it is ready."""
+    release = threading.Event()
+
+    def get_project_files():
+        release.wait(5)
+        return ProjectFiles(["chat.py"], ["/repo/chat.py"], ["./chat.py"], ["repo"])
+
+    monkeypatch.setattr(command_completer, "get_project_files", get_project_files)
+    completer = CommandCompleter(["/add_files", "/cd"])
+    ready = threading.Event()
+    completer.when_ready(ready.set)
+    completer.refresh_files(background=True)
+
+    assert not completer.ready.is_set()
+    assert completions(completer, "/ad") == ["/add_files"]
+    assert completions(completer, "/add_files ch") == []
+
+    release.set()
+    assert ready.wait(5)
+    assert completions(completer, "/add_files ch") == ["chat.py"]
+
+def test_apply_changes_counts_shared_names(monkeypatch):
+    """Test that a name stays completable until the last file with it is removed."""
+    monkeypatch.setattr(command_completer, "get_project_files", lambda: ProjectFiles(
+        ["utils.py", "utils.py"], ["/repo/a/utils.py", "/repo/b/utils.py"], ["./a/utils.py", "./b/utils.py"], ["a", "b"]))
+    completer = CommandCompleter(["/add_files", "/cd"])
+    completer.refresh_files()
+
+    changes = IndexChanges()
+    changes.removed_files = ["/repo/a/utils.py"]
+    changes.removed_dirs = ["/repo/a"]
+    changes.added_files = ["/repo/b/util_test.py"]
+    completer.apply_changes(changes)
+    assert completions(completer, "/add_files ut") == ["util_test.py", "utils.py"]
+    assert completions(completer, "/cd a") == []
+    assert completions(completer, "/cd b") == ["b"]
+
+    changes = IndexChanges()
+    changes.removed_files = ["/repo/b/utils.py"]
+    completer.apply_changes(changes)
+    assert completions(completer, "/add_files ut") == ["util_test.py"]
+
+def test_mentions_complete_base_names_of_matching_paths(monkeypatch):
+    """Test that @ completions insert the base name of a path matched anywhere."""
+    monkeypatch.setattr(command_completer, "PROJECT_ROOT", "/repo")
+    monkeypatch.setattr(command_completer, "get_project_files", lambda: ProjectFiles(
+        ["chat.py", "utils.py"], ["/repo/src/chat.py", "/repo/src/utils.py"],
+        ["./src/chat.py", "./src/utils.py"], ["src"]))
+    completer = CommandCompleter(["/coding"])
+    completer.refresh_files()
+
+    found = list(completer.get_completions(Document("/coding fix @hat"), None))
+    assert [(c.text, c.display_text) for c in found] == [("chat.py", "src/chat.py")]
+    assert [c.text for c in completer.get_completions(Document("/coding fix @repo"), None)] == []
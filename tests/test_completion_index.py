@@ -0,0 +1,48 @@
+from auto_coder_chat_lite.common import completion_index
+from auto_coder_chat_lite.common.completion_index import CompletionIndex
+
+PATHS = [
+    "/repo/src/chat.py",
+    "/repo/src/chat_utils.py",
+    "/repo/src/common/utils.py",
+    "/repo/tests/test_chat.py",
+    "/repo/docs/utils.md",
+]
+
+def test_prefix():
+    """Test that prefix lookups return the sorted items starting with the prefix."""
+    index = CompletionIndex(["b.py", "a.py", "ab.py", "a.py", "c.py"])
+    assert index.prefix("a") == ["a.py", "ab.py"]
+    assert index.prefix("a", limit=1) == ["a.py"]
+    assert index.prefix("z") == []
+
+def test_search_ranks_by_match_quality():
+    """Test that exact and prefix matches of the base name come first."""
+    index = CompletionIndex(PATHS)
+    assert index.search("chat") == [
+        "/repo/src/chat.py",
+        "/repo/src/chat_utils.py",
+        "/repo/tests/test_chat.py",
+    ]
+    assert index.search("utils", limit=2) == ["/repo/docs/utils.md", "/repo/src/common/utils.py"]
+
+def test_search_matches_substrings_across_directories():
+    """Test that substring lookups match directory parts as well."""
+    index = CompletionIndex(PATHS)
+    assert index.search("mon/ut") == ["/repo/src/common/utils.py"]
+    assert index.search("c/c") == ["/repo/src/chat.py", "/repo/src/chat_utils.py", "/repo/src/common/utils.py"]
+    assert index.search("missing") == []
+
+def test_updated_patches_a_copy(monkeypatch):
+    """Test that updates are served from an overlay until it is merged in by a rebuild."""
+    index = CompletionIndex(PATHS)
+    updated = index.updated(["/repo/src/chat_new.py"], ["/repo/src/chat_utils.py", "/repo/missing.py"])
+    assert updated.prefix("/repo/src/c") == ["/repo/src/chat.py", "/repo/src/chat_new.py", "/repo/src/common/utils.py"]
+    assert updated.search("chat_") == ["/repo/src/chat_new.py"]
+    assert len(updated) == len(PATHS)
+    assert index.search("chat_") == ["/repo/src/chat_utils.py"]
+    assert updated.updated(removed=["/repo/src/chat_new.py"], added=["/repo/src/chat_utils.py"]).search("chat_") == ["/repo/src/chat_utils.py"]
+
+    monkeypatch.setattr(completion_index, "OVERLAY_SIZE", 1)
+    rebuilt = index.updated(["/repo/a.py", "/repo/b.py"])
+    assert rebuilt.items == sorted(PATHS + ["/repo/a.py", "/repo/b.py"])
@@ -1,7 +1,7 @@
 import pytest
 from hy import eval
 from auto_coder_chat_lite.configuration_handler import handle_configuration
-from auto_coder_chat_lite.constants import SHOW_FILE_TREE, EDITBLOCK_SIMILARITY, MERGE_TYPE, MERGE_CONFIRM, HUMAN_AS_MODEL, LANGUAGE
+from auto_coder_chat_lite.constants import SHOW_FILE_TREE, EDITBLOCK_SIMILARITY, MERGE_TYPE, MERGE_CONFIRM, HUMAN_AS_MODEL, LANGUAGE, FILE_WATCHER, SCAN_WORKERS, FILE_TREE_BUDGET, CONTEXT_TOKEN_LIMIT, PROMPT_LAYOUT, CONTEXT_MODE, MULTI_TURN, RESPONSE_CACHE
 
 @pytest.fixture
 def memory():
@@ -36,6 +36,56 @@ def test_handle_configuration_set_human_as_model(memory, save_memory):
     handle_configuration(user_input, memory, save_memory)
     assert memory["conf"][HUMAN_AS_MODEL] == True
 
+
+def test_handle_configuration_set_file_watcher(memory, save_memory):
+    user_input = f"/conf {FILE_WATCHER} true"
+    handle_configuration(user_input, memory, save_memory)
+    assert memory["conf"][FILE_WATCHER] == True
+
+
+def test_handle_configuration_set_scan_workers(memory, save_memory):
+    handle_configuration(f"/conf {SCAN_WORKERS} 8", memory, save_memory)
+    assert memory["conf"][SCAN_WORKERS] == 8
+    handle_configuration(f"/conf {SCAN_WORKERS} 0", memory, save_memory)
+    assert memory["conf"][SCAN_WORKERS] == 8
+
+
+def test_handle_configuration_set_file_tree_budget(memory, save_memory):
+    handle_configuration(f"/conf {FILE_TREE_BUDGET} 2000", memory, save_memory)
+    assert memory["conf"][FILE_TREE_BUDGET] == 2000
+    handle_configuration(f"/conf {FILE_TREE_BUDGET} -1", memory, save_memory)
+    assert memory["conf"][FILE_TREE_BUDGET] == 2000
+
+
+def test_handle_configuration_set_context_token_limit(memory, save_memory):
+    handle_configuration(f"/conf {CONTEXT_TOKEN_LIMIT} 128000", memory, save_memory)
+    assert memory["conf"][CONTEXT_TOKEN_LIMIT] == 128000
+
+
+def test_handle_configuration_set_prompt_layout(memory, save_memory):
+    handle_configuration(f"/conf {PROMPT_LAYOUT} cache", memory, save_memory)
+    assert memory["conf"][PROMPT_LAYOUT] == "cache"
+    handle_configuration(f"/conf {PROMPT_LAYOUT} other", memory, save_memory)
+    assert memory["conf"][PROMPT_LAYOUT] == "cache"
+
+
+def test_handle_configuration_set_context_mode(memory, save_memory):
+    handle_configuration(f"/conf {CONTEXT_MODE} symbols", memory, save_memory)
+    assert memory["conf"][CONTEXT_MODE] == "symbols"
+
+
+def test_handle_configuration_set_multi_turn(memory, save_memory):
+    user_input = f"/conf {MULTI_TURN} true"
+    handle_configuration(user_input, memory, save_memory)
+    assert memory["conf"][MULTI_TURN] == True
+
+
+def test_handle_configuration_set_response_cache(memory, save_memory):
+    user_input = f"/conf {RESPONSE_CACHE} true"
+    handle_configuration(user_input, memory, save_memory)
+    assert memory["conf"][RESPONSE_CACHE] == True
+
+
 def test_handle_configuration_set_language(memory, save_memory):
     user_input = f"/conf {LANGUAGE} zh"
     handle_configuration(user_input, memory, save_memory)
@@ -0,0 +1,41 @@
+from auto_coder_chat_lite.common.conversation import Conversation, content_digest
+
+def test_first_turn_sends_every_file():
+    """Test that files new to the conversation are sent in full."""
+    conversation = Conversation()
+    conversation.start([])
+    delta = conversation.delta([("a.py", "a = 1\n")])
+    assert delta.added == [("a.py", "a = 1\n")]
+    assert (delta.changed, delta.unchanged, delta.removed) == ([], [], [])
+
+def test_follow_up_sends_only_deltas():
+    """Test that follow-up turns send diffs of changed files and omit unchanged ones."""
+    turns = [{"query": "stale"}]
+    conversation = Conversation()
+    conversation.start(turns)
+    assert turns == [] and not conversation.active
+
+    big = "".join(f"line {i}\n" for i in range(50))
+    contents = [("a.py", big), ("b.py", "b = 1\n"), ("c.py", "c = 1\n")]
+    conversation.record("first", contents, "prompt", "response")
+    assert conversation.active
+    assert turns == [{"query": "first", "files": {path: content_digest(code) for path, code in contents}}]
+    assert conversation.messages == [{"role": "user", "content": "prompt"},
+                                     {"role": "assistant", "content": "response"}]
+
+    changed = big.replace("line 25\n", "line twenty-five\n")
+    delta = conversation.delta([("a.py", changed), ("b.py", "b = 1\n"), ("d.py", "d = 1\n")])
+    assert [file_path for file_path, _ in delta.changed] == ["a.py"]
+    diff = delta.changed[0][1]
+    assert "-line 25\n+line twenty-five\n" in diff and "line 10\n" not in diff
+    assert delta.added == [("d.py", "d = 1\n")]
+    assert delta.unchanged == ["b.py"]
+    assert delta.removed == ["c.py"]
+
+def test_rewritten_file_is_sent_in_full():
+    """Test that a file whose diff would be longer than the file is sent whole."""
+    conversation = Conversation()
+    conversation.start([])
+    conversation.record("first", [("b.py", "b = 1\n")], "prompt", "response")
+    delta = conversation.delta([("b.py", "b = 2\n")])
+    assert delta.added == [("b.py", "b = 2\n")] and delta.changed == []
@@ -0,0 +1,48 @@
+import os
+import pytest
+from auto_coder_chat_lite.common.exclude_matcher import ExcludeMatcher
+from auto_coder_chat_lite.common.file_index import ProjectFileIndex
+
+@pytest.fixture
+def temp_dir(tmpdir):
+    """Create a temporary project with a root and a nested .gitignore."""
+    temp_dir = tmpdir.mkdir("test_dir")
+    temp_dir.join(".gitignore").write("*.log\n/build/\n")
+    temp_dir.join("app.log").write("")
+    temp_dir.mkdir("build").join("out.js").write("")
+    pkg = temp_dir.mkdir("pkg")
+    pkg.join(".gitignore").write("!keep.log\ngenerated/\n")
+    pkg.join("keep.log").write("")
+    pkg.join("other.log").write("")
+    pkg.mkdir("build").join("main.py").write("")
+    pkg.mkdir("generated").join("big.py").write("")
+    temp_dir.mkdir("node_modules").join("dep.js").write("")
+    return temp_dir
+
+def test_nested_gitignore(temp_dir):
+    """Test that nested .gitignore files are honored and pruned directories are never listed."""
+    index = ProjectFileIndex(str(temp_dir))
+    index.refresh(ExcludeMatcher(str(temp_dir), ["node_modules/"]))
+    files = sorted(os.path.relpath(f, str(temp_dir)).replace(os.sep, "/") for f in index.files())
+    assert files == [".gitignore", "pkg/.gitignore", "pkg/build/main.py", "pkg/keep.log"]
+    assert "node_modules" not in index._dirs
+    assert "pkg/generated" not in index._dirs
+
+def test_is_excluded_checks_parent_dirs(temp_dir):
+    """Test that is_excluded rejects files inside excluded directories."""
+    matcher = ExcludeMatcher(str(temp_dir), ["node_modules/"])
+    matcher.load_gitignore("")
+    assert matcher.is_excluded(str(temp_dir.join("build", "out.js")))
+    assert matcher.is_excluded(str(temp_dir.join("node_modules", "dep.js")))
+    assert not matcher.is_excluded(str(temp_dir.join("pkg", "build", "main.py")))
+
+def test_gitignore_change_invalidates_matcher(temp_dir):
+    """Test that editing a .gitignore bumps the matcher version."""
+    matcher = ExcludeMatcher(str(temp_dir))
+    matcher.load_gitignore("")
+    version = matcher.version
+    assert matcher.load_gitignore("") is False
+    temp_dir.join(".gitignore").write("*.log\n/build/\n*.tmp\n")
+    assert matcher.load_gitignore("") is True
+    assert matcher.version > version
+    assert matcher.match("a.tmp")
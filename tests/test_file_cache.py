@@ -0,0 +1,66 @@
+import os
+from auto_coder_chat_lite.common.file_cache import FileContentCache
+
+def write(path, content, age=10):
+    """Write a file and date it back so it is not considered racy."""
+    path.write(content)
+    mtime = path.stat().mtime - age
+    os.utime(str(path), (mtime, mtime))
+
+def test_unchanged_files_are_served_from_cache(tmpdir):
+    """Test that a file is read again only once its stamp changes."""
+    file = tmpdir.join("a.py")
+    write(file, "one")
+    cache = FileContentCache()
+    assert cache.read(str(file)) == "one"
+    assert cache.read(str(file)) == "one"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    write(file, "two!", age=5)
+    assert cache.read(str(file)) == "two!"
+    assert cache.misses == 2
+
+def test_cache_is_bounded_by_bytes(tmpdir):
+    """Test that the least recently used files are evicted past max_bytes."""
+    cache = FileContentCache(max_bytes=10)
+    for name in ["a", "b", "c"]:
+        write(tmpdir.join(name), "xxxx")
+        cache.read(str(tmpdir.join(name)))
+    assert cache.total_bytes == 8
+    cache.read(str(tmpdir.join("b")))
+    cache.read(str(tmpdir.join("a")))
+    assert (cache.hits, cache.misses) == (1, 4)
+
+def test_read_many_keeps_order_and_total_cap(tmpdir):
+    """Test that concurrent reads come back in order and the total cap applies in that order."""
+    paths = []
+    for i in range(6):
+        write(tmpdir.join(f"{i}.txt"), f"{i}" * 40)
+        paths.append(str(tmpdir.join(f"{i}.txt")))
+    result = FileContentCache().read_many(paths, max_file_bytes=100, max_total_bytes=100, workers=4)
+    assert [path for path, _ in result.contents] == paths
+    assert [content for _, content in result.contents[:2]] == ["0" * 40, "1" * 40]
+    assert result.contents[2][1].startswith("2" * 10)
+    assert result.contents[3][1].startswith("[omitted")
+
+def test_read_many_excerpts_do_not_replace_cached_files(tmpdir):
+    """Test that a file cut to the total cap stays cached in full."""
+    paths = []
+    for i in range(2):
+        write(tmpdir.join(f"{i}.txt"), f"{i}" * 60)
+        paths.append(str(tmpdir.join(f"{i}.txt")))
+    cache = FileContentCache()
+    result = cache.read_many(paths, max_file_bytes=100, max_total_bytes=100, workers=1)
+    assert "omitted" in result.contents[1][1]
+    assert cache.read(paths[1], 100) == "1" * 60
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_read_many_caps_the_total_in_bytes(tmpdir):
+    """Test that the total cap counts the UTF-8 bytes of non-ASCII files."""
+    paths = []
+    for i in range(2):
+        write(tmpdir.join(f"{i}.txt"), "é" * 40)
+        paths.append(str(tmpdir.join(f"{i}.txt")))
+    result = FileContentCache().read_many(paths, max_file_bytes=100, max_total_bytes=100, workers=1)
+    assert result.contents[0][1] == "é" * 40
+    assert "omitted" in result.contents[1][1]
@@ -0,0 +1,63 @@
+import os
+import pytest
+from auto_coder_chat_lite.common import file_index
+from auto_coder_chat_lite.common.file_index import ProjectFileIndex
+
+@pytest.fixture
+def temp_dir(tmpdir):
+    """Create a temporary directory with some files and directories."""
+    temp_dir = tmpdir.mkdir("test_dir")
+    temp_dir.join("file1.txt").write("")
+    temp_dir.mkdir("subdir").join("file2.txt").write("")
+    temp_dir.mkdir("node_modules").join("dep.js").write("")
+    return temp_dir
+
+def test_walk_excludes_dirs(temp_dir):
+    """Test that excluded directories are neither listed nor walked."""
+    index = ProjectFileIndex(str(temp_dir))
+    index.refresh(["node_modules/"])
+    assert list(index.walk()) == [
+        (str(temp_dir), ["subdir"], ["file1.txt"]),
+        (os.path.join(str(temp_dir), "subdir"), [], ["file2.txt"]),
+    ]
+
+def test_refresh_persists_and_reuses_listings(tmpdir, temp_dir, monkeypatch):
+    """Test that a reloaded index only re-lists directories whose mtime changed."""
+    index_file = str(tmpdir.join("index.json"))
+    ProjectFileIndex(str(temp_dir), index_file).refresh()
+    monkeypatch.setattr(file_index, "RACY_MTIME_NS", 0)
+
+    index = ProjectFileIndex(str(temp_dir), index_file)
+    index.refresh()
+    scanned = []
+    scan_dir = index._scan_dir
+    monkeypatch.setattr(index, "_scan_dir", lambda path, mtime: scanned.append(path) or scan_dir(path, mtime))
+
+    assert index.refresh() is False
+    assert scanned == []
+
+    temp_dir.join("subdir").join("file3.txt").write("")
+    # Make the mtime change independent of the file system timestamp granularity.
+    os.utime(str(temp_dir.join("subdir")), ns=(0, 10**9))
+    assert index.refresh() is True
+    assert scanned == [os.path.join(str(temp_dir), "subdir")]
+    assert os.path.join(str(temp_dir), "subdir", "file3.txt") in index.files()
+
+def test_parallel_refresh_matches_serial(temp_dir):
+    """Test that listing directories on a thread pool gives the same sorted walk."""
+    for i in range(5):
+        temp_dir.join("subdir").mkdir(f"nested{i}").join("file.txt").write("")
+    serial = ProjectFileIndex(str(temp_dir))
+    serial.refresh(["node_modules/"])
+    parallel = ProjectFileIndex(str(temp_dir), workers=4)
+    parallel.refresh(["node_modules/"])
+    assert list(parallel.walk()) == list(serial.walk())
+
+def test_replaced_matcher_refilters_listings(temp_dir, monkeypatch):
+    """Test that a directory excluded by a previous matcher is listed again."""
+    monkeypatch.setattr(file_index, "RACY_MTIME_NS", 0)
+    index = ProjectFileIndex(str(temp_dir))
+    index.refresh(["subdir/"])
+    assert [dirs for _, dirs, _ in index.walk()] == [["node_modules"], []]
+    index.refresh([])
+    assert list(index.walk())[0][1] == ["node_modules", "subdir"]
@@ -0,0 +1,27 @@
+from auto_coder_chat_lite.common import file_reader
+from auto_coder_chat_lite.common.file_reader import describe_oversized, read_text
+
+def test_read_text_keeps_small_files(tmpdir):
+    """Test that files within the cap are read in full with universal newlines."""
+    file = tmpdir.join("a.py")
+    file.write_binary(b"one\r\ntwo\n")
+    assert read_text(str(file)) == "one\ntwo\n"
+    assert describe_oversized(str(file)) is None
+
+def test_read_text_skips_binary_files(tmpdir):
+    """Test that binary files are replaced by a note."""
+    file = tmpdir.join("a.bin")
+    file.write_binary(b"\x89PNG\0\0data")
+    assert read_text(str(file)) == "[binary file, 10 bytes omitted]"
+    assert describe_oversized(str(file)).startswith("binary")
+
+def test_read_text_keeps_head_and_tail(tmpdir, monkeypatch):
+    """Test that oversized files are cut to line aligned head and tail excerpts, memory-mapped when large."""
+    monkeypatch.setattr(file_reader, "MMAP_THRESHOLD", 100)
+    file = tmpdir.join("big.js")
+    file.write("".join(f"line {i:03}\n" for i in range(100)))
+    text = read_text(str(file), max_bytes=100)
+    head, tail = text.split("\n... [800 bytes omitted] ...\n\n")
+    assert head == "".join(f"line {i:03}\n" for i in range(8))
+    assert tail == "line 098\nline 099\n"
+    assert describe_oversized(str(file), max_bytes=100) is not None
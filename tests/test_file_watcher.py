@@ -0,0 +1,63 @@
+import os
+import sys
+import threading
+import pytest
+from auto_coder_chat_lite.common.file_index import IndexChanges, ProjectFileIndex
+from auto_coder_chat_lite.common.file_watcher import FileWatcher
+
+@pytest.fixture
+def index(tmpdir):
+    """Create an index of a temporary directory with a file and a sub directory."""
+    temp_dir = tmpdir.mkdir("test_dir")
+    temp_dir.join("file1.txt").write("")
+    temp_dir.mkdir("subdir").join("file2.txt").write("")
+    index = ProjectFileIndex(str(temp_dir))
+    index.refresh()
+    return index
+
+def test_update_dirs_records_changes(index):
+    """Test that update_dirs re-lists a directory and reports what changed."""
+    root = index.root_dir
+    os.remove(os.path.join(root, "subdir", "file2.txt"))
+    os.makedirs(os.path.join(root, "subdir", "new"))
+    with open(os.path.join(root, "subdir", "new", "file3.txt"), "w") as f:
+        f.write("")
+
+    changes = IndexChanges()
+    assert index.update_dirs([os.path.join(root, "subdir")], changes)
+    assert changes.removed_files == [os.path.join(root, "subdir", "file2.txt")]
+    assert changes.added_files == [os.path.join(root, "subdir", "new", "file3.txt")]
+    assert changes.added_dirs == [os.path.join(root, "subdir", "new")]
+    assert sorted(index.files()) == [os.path.join(root, "file1.txt"), os.path.join(root, "subdir", "new", "file3.txt")]
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_watcher_reports_created_files(index):
+    """Test that the watcher applies a file created on disk to the index."""
+    received = []
+    done = threading.Event()
+
+    def on_change(changes):
+        received.extend(changes.added_files)
+        done.set()
+
+    watcher = FileWatcher(index, on_change, debounce=0.05)
+    watcher.start()
+    try:
+        new_file = os.path.join(index.root_dir, "subdir", "created.txt")
+        with open(new_file, "w") as f:
+            f.write("")
+        assert done.wait(5)
+        assert received == [new_file]
+        assert new_file in index.files()
+    finally:
+        watcher.stop()
+
+def test_update_dirs_saves_on_flush(tmpdir, index):
+    """Test that event batches are saved by flush instead of one by one."""
+    index.index_file = str(tmpdir.join("index.json"))
+    with open(os.path.join(index.root_dir, "created.txt"), "w") as f:
+        f.write("")
+    assert index.update_dirs([index.root_dir])
+    assert not os.path.exists(index.index_file)
+    index.flush()
+    assert os.path.exists(index.index_file)
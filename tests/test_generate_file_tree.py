@@ -1,6 +1,17 @@
 import os
 import pytest
 from auto_coder_chat_lite.chat import generate_file_tree
+from auto_coder_chat_lite.common import file_index
+from auto_coder_chat_lite.common.file_index import ProjectFileIndex
+from auto_coder_chat_lite.common.file_tree import render_file_tree
+from auto_coder_chat_lite.common.token_budget import estimate_tokens
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    """Persist the indexes of generate_file_tree in a tmp dir instead of the checkout."""
+    monkeypatch.setattr(file_index, "INDEX_DIR", str(tmp_path / "file_index"))
+
 
 @pytest.fixture
 def temp_dir(tmpdir):
@@ -10,6 +21,60 @@ def temp_dir(tmpdir):
     temp_dir.mkdir("subdir").join("file2.txt").write("")
     return temp_dir
 
+
+def test_generate_file_tree_collapses_over_budget(temp_dir):
+    """Test that directories that do not fit the budget are summarized, except around kept files."""
+    gen = temp_dir.mkdir("gen")
+    for i in range(50):
+        gen.join(f"module_{i}.py").write("")
+    other = temp_dir.mkdir("other")
+    for i in range(50):
+        other.join(f"module_{i}.py").write("")
+    kept = other.join("module_7.py")
+
+    budget = estimate_tokens(f"{temp_dir}/") + 40
+    result = generate_file_tree(str(temp_dir), budget=budget, keep_paths=[str(kept)])
+    assert result == str(temp_dir) + (
+        "/\n"
+        "    file1.txt\n"
+        "    gen/ (50 files)\n"
+        "    other/\n"
+        "        module_7.py\n"
+        "        ... (49 more entries)\n"
+        "    subdir/\n"
+        "        file2.txt"
+    )
+
+
+def test_file_tree_is_memoized(temp_dir, monkeypatch):
+    """Test that an unchanged tree is not rendered again and unchanged subtrees are reused."""
+    temp_dir.mkdir("other").join("file3.txt").write("")
+    index = ProjectFileIndex(str(temp_dir))
+    index.refresh()
+    first = render_file_tree(index, str(temp_dir))
+
+    listed = []
+    listdir = index.listdir
+    monkeypatch.setattr(index, "listdir", lambda path: listed.append(path) or listdir(path))
+    assert render_file_tree(index, str(temp_dir)) == first
+    assert listed == []
+
+    temp_dir.join("other", "file4.txt").write("")
+    index.update_dirs([str(temp_dir.join("other"))])
+    assert render_file_tree(index, str(temp_dir)).endswith("file4.txt\n    subdir/\n        file2.txt")
+    assert str(temp_dir.join("subdir")) not in listed
+
+
+def test_symlinked_dirs_have_no_count(temp_dir):
+    """Test that directories the index does not descend into are listed without a file count."""
+    temp_dir.join("link").mksymlinkto(temp_dir.join("subdir"))
+    index = ProjectFileIndex(str(temp_dir))
+    index.refresh()
+    for budget in (None, 1000):
+        lines = render_file_tree(index, str(temp_dir), budget=budget).splitlines()
+        assert "    link/" in lines
+
+
 def test_generate_file_tree(temp_dir):
     """Test the generate_file_tree function."""
     expected_output = str(temp_dir) +(
@@ -0,0 +1,57 @@
+import os
+import glob
+import pytest
+from auto_coder_chat_lite.common.file_index import ProjectFileIndex
+from auto_coder_chat_lite.common.pattern_resolver import file_name_index, resolve_mentions, resolve_patterns
+
+@pytest.fixture
+def temp_dir(tmpdir):
+    """Create a temporary project with nested and hidden files."""
+    temp_dir = tmpdir.mkdir("test_dir")
+    temp_dir.join("chat.py").write("")
+    temp_dir.join("chat_utils.py").write("")
+    temp_dir.join(".hidden.py").write("")
+    src = temp_dir.mkdir("src")
+    src.join("chat.py").write("")
+    src.join("main.hy").write("")
+    src.mkdir("deep").join("util.py").write("")
+    return temp_dir
+
+@pytest.fixture
+def index(temp_dir):
+    index = ProjectFileIndex(str(temp_dir))
+    index.refresh()
+    return index
+
+@pytest.mark.parametrize("pattern", ["*.py", "**/*.py", "src/*", "src/**", "src/**/*.py", "?hat.py", "[a-c]*.py"])
+def test_globs_match_like_glob(temp_dir, index, pattern):
+    """Test that globs resolved from the index match glob.glob."""
+    expected = sorted(os.path.abspath(p) for p in glob.glob(os.path.join(str(temp_dir), pattern), recursive=True)
+                      if os.path.isfile(p))
+    assert sorted(resolve_patterns(index, [pattern], cwd=str(temp_dir))) == expected
+
+def test_plain_patterns_in_one_pass(temp_dir, index):
+    """Test that names match exactly per directory, paths match by prefix, and misses are kept."""
+    result = resolve_patterns(index, ["chat.py", "src/de", "missing.py"], cwd=str(temp_dir))
+    assert sorted(result) == sorted([
+        str(temp_dir.join("chat.py")),
+        str(temp_dir.join("src", "chat.py")),
+        str(temp_dir.join("src", "deep", "util.py")),
+        "missing.py",
+    ])
+
+def test_resolve_mentions(temp_dir, index):
+    """Test that mentions are looked up by name, reporting ambiguous and missing names."""
+    result = resolve_mentions(index, ["main.hy", "chat.py", "missing.py", "main.hy"])
+    chat_paths = sorted([str(temp_dir.join("chat.py")), str(temp_dir.join("src", "chat.py"))])
+    assert result.files == [str(temp_dir.join("src", "main.hy"))] + chat_paths
+    assert result.ambiguous == {"chat.py": chat_paths}
+    assert result.missing == ["missing.py"]
+
+def test_file_name_index_follows_changes(temp_dir, index):
+    """Test that the name index is reused until a listing changes."""
+    names = file_name_index(index)
+    assert file_name_index(index) is names
+    temp_dir.join("src", "deep", "main.hy").write("")
+    index.update_dirs([str(temp_dir.join("src", "deep"))])
+    assert len(file_name_index(index)["main.hy"]) == 2
@@ -0,0 +1,23 @@
+from auto_coder_chat_lite.common.prompt_cache import PREFIX_BLOCK_SIZE, PromptCacheLayout
+
+def test_split_files_keeps_unchanged_files_first():
+    """Test that unchanged files are sorted ahead of changed and new ones."""
+    layout = PromptCacheLayout()
+    unchanged, changed = layout.split_files([("b.py", "b"), ("a.py", "a")])
+    assert (unchanged, changed) == ([("a.py", "a"), ("b.py", "b")], [])
+
+    unchanged, changed = layout.split_files([("c.py", "c"), ("b.py", "b2"), ("a.py", "a")])
+    assert unchanged == [("a.py", "a")]
+    assert changed == [("c.py", "c"), ("b.py", "b2")]
+
+def test_measure_compares_consecutive_prompts(tmpdir):
+    """Test that the shared prefix of consecutive prompts is measured offline."""
+    layout = PromptCacheLayout()
+    prompt = tmpdir.join("output.txt")
+    stable = "x" * (PREFIX_BLOCK_SIZE * 3)
+    prompt.write(stable + "query one")
+    assert layout.measure(str(prompt)) == (0, len(stable) + 9)
+    prompt.write(stable + "query two")
+    assert layout.measure(str(prompt)) == (len(stable), len(stable) + 9)
+    prompt.write("y" + stable)
+    assert layout.measure(str(prompt))[0] == 0
@@ -0,0 +1,30 @@
+import os
+import pytest
+from auto_coder_chat_lite import chat
+from auto_coder_chat_lite.chat import get_template_environment, read_rendered, render_template, render_template_to_file
+
+@pytest.fixture(autouse=True)
+def jinja_cache_dir(tmp_path, monkeypatch):
+    """Cache the template bytecode in a tmp dir instead of the checkout."""
+    monkeypatch.setattr(chat, "JINJA_CACHE_DIR", str(tmp_path / "jinja_cache"))
+    monkeypatch.setattr(chat, "template_environments", {})
+
+def test_template_environment_is_shared_and_reloads(tmpdir):
+    """Test that one environment is kept per directory and edited templates are recompiled."""
+    template = tmpdir.join("hello.txt")
+    template.write("Hello {{ name }}")
+    env = get_template_environment(str(tmpdir))
+    assert get_template_environment(str(tmpdir)) is env
+    assert env.get_template("hello.txt").render(name="a") == "Hello a"
+
+    template.write("Bye {{ name }}")
+    mtime = template.stat().mtime + 10
+    os.utime(str(template), (mtime, mtime))
+    assert env.get_template("hello.txt").render(name="a") == "Bye a"
+
+def test_render_template_to_file_matches_render(tmpdir):
+    """Test that the streamed prompt is identical to the rendered one."""
+    kwargs = dict(files="a.py", project_root="/p", files_code="##File: a.py\nx = 1", query="q", merge_type="search_replace")
+    output = str(tmpdir.join("output.txt"))
+    render_template_to_file("code.txt", output, **kwargs)
+    assert read_rendered(output) == render_template("code.txt", **kwargs)
@@ -0,0 +1,39 @@
+import os
+import time
+from auto_coder_chat_lite.common.response_cache import ResponseCache
+
+def test_fingerprint_covers_the_request():
+    """Test that the key changes with the model, the messages and the parameters."""
+    messages = [{"role": "user", "content": "hi"}]
+    key = ResponseCache.fingerprint("m", messages, {"max-tokens": None})
+    assert key == ResponseCache.fingerprint("m", [dict(messages[0])], {"max-tokens": None})
+    assert key != ResponseCache.fingerprint("n", messages, {"max-tokens": None})
+    assert key != ResponseCache.fingerprint("m", [{"role": "user", "content": "ho"}], {"max-tokens": None})
+    assert key != ResponseCache.fingerprint("m", messages, {"max-tokens": 5})
+
+def test_get_and_ttl(tmpdir):
+    """Test that responses are replayed until they expire."""
+    cache = ResponseCache(str(tmpdir), ttl=60)
+    assert cache.get("ab12") is None
+    cache.put("ab12", ["a", "b"])
+    assert cache.get("ab12") == ["a", "b"]
+    cache.ttl = -1
+    assert cache.get("ab12") is None
+    assert not os.path.exists(tmpdir.join("ab", "ab12.json"))
+
+def test_lru_eviction(tmpdir):
+    """Test that the least recently used responses are evicted over max_bytes."""
+    cache = ResponseCache(str(tmpdir))
+    for key in ["aa01", "aa02", "aa03"]:
+        cache.put(key, ["x" * 100])
+    size = os.path.getsize(tmpdir.join("aa", "aa01.json"))
+    past = time.time() - 100
+    for i, key in enumerate(["aa01", "aa02", "aa03"]):
+        os.utime(tmpdir.join("aa", f"{key}.json"), (past + i, past + i))
+    assert cache.get("aa01") is not None
+
+    # The files differ by a few bytes of their timestamps.
+    cache.max_bytes = size * 2 + 10
+    cache.evict()
+    assert cache.get("aa02") is None
+    assert cache.get("aa01") is not None and cache.get("aa03") is not None
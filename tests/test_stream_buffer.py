@@ -0,0 +1,25 @@
+from auto_coder_chat_lite.common.stream_buffer import StreamBuffer, Throttle
+
+def test_stream_buffer_keeps_text_and_tail():
+    """Test that chunks split anywhere give the full text and the last lines."""
+    text = "".join(f"line {i}\n" for i in range(100)) + "partial"
+    buffer = StreamBuffer(3)
+    for i in range(0, len(text), 7):
+        buffer.append(text[i:i + 7])
+    assert buffer.text() == text
+    assert buffer.tail() == "line 98\nline 99\npartial"
+    assert buffer.line_count == 100
+
+    buffer.append("\n")
+    assert buffer.tail() == "line 99\npartial\n"
+    assert buffer.text() == text + "\n"
+
+def test_throttle():
+    """Test that the throttle lets one call through per interval."""
+    now = [0.0]
+    throttle = Throttle(4, clock=lambda: now[0])
+    assert throttle.ready()
+    now[0] = 0.1
+    assert not throttle.ready()
+    now[0] = 0.25
+    assert throttle.ready()
@@ -0,0 +1,55 @@
+from auto_coder_chat_lite.common.symbol_context import extract_relevant, query_identifiers
+
+PYTHON_CODE = '''import os
+
+@decorator
+def alpha(a, b):
+    """Doc."""
+    return a + b
+
+class Beta(Base):
+    attr = 1
+
+    def gamma(self):
+        return 1
+
+    def delta(self, x):
+        return x
+'''
+
+def test_python_keeps_relevant_symbols_and_signatures():
+    """Test that Python files keep the wanted methods whole and reduce the rest to signatures."""
+    result = extract_relevant("a.py", PYTHON_CODE, query_identifiers("make @gamma return 2"))
+    assert result == '''import os
+
+@decorator
+def alpha(a, b):
+    ...
+
+class Beta(Base):
+    attr = 1
+
+    def gamma(self):
+        return 1
+
+    def delta(self, x):
+        ...
+'''
+    assert extract_relevant("a.py", PYTHON_CODE, {"beta"}).endswith("        return x\n")
+
+def test_python_member_decorators_are_kept_once():
+    """Test that the decorators of the first member of a class are not repeated."""
+    code = "class Foo:\n    @property\n    def bar(self):\n        return 1\n"
+    assert extract_relevant("a.py", code, set()) == "class Foo:\n    @property\n    def bar(self):\n        ...\n"
+
+def test_hy_and_brace_languages():
+    """Test the light parsers for Hy and brace delimited languages."""
+    hy_code = '(import os)\n(defn foo [a b]\n  (+ a b))\n(defn bar [x] (print ")" x))\n'
+    assert extract_relevant("a.hy", hy_code, {"bar"}) == '(import os)\n(defn foo [a b] ...)\n(defn bar [x] (print ")" x))\n'
+
+    js_code = 'function foo(a) {\n  return "}";\n}\nclass W {\n  update(x) {\n    this.x = x;\n  }\n}\n'
+    assert extract_relevant("a.js", js_code, {"update"}) == 'function foo(a) {\n    ...\n}\nclass W {\n  update(x) {\n    this.x = x;\n  }\n}\n'
+
+def test_unparsable_files_are_unchanged():
+    assert extract_relevant("a.py", "def broken(:\n", set()) == "def broken(:\n"
+    assert extract_relevant("a.txt", "text", set()) == "text"
@@ -0,0 +1,38 @@
+from auto_coder_chat_lite.common.token_budget import ContextBudget, estimate_tokens, truncate_text
+
+def test_truncate_text_keeps_leading_lines():
+    """Test that truncation keeps whole leading lines within the token limit."""
+    text = "".join(f"line {i}\n" for i in range(100))
+    result = truncate_text(text, 50, estimate_tokens)
+    assert estimate_tokens(result) <= 50
+    assert result.startswith("line 0\nline 1\n")
+    assert result.endswith("[truncated to fit the context token limit]")
+    assert truncate_text(text, 5, estimate_tokens) == ""
+
+def test_fit_shrinks_lowest_priority_first():
+    """Test that fit shrinks low priority sections, the last added first, and leaves fixed ones alone."""
+    budget = ContextBudget(100, count_tokens=len)
+    shrink = lambda text, tokens: text[:tokens]
+    budget.add("query", "q" * 30, priority=3)
+    current = budget.add("current", "c" * 40, priority=2, shrink=shrink)
+    first = budget.add("first", "m" * 20, priority=1, shrink=shrink)
+    second = budget.add("second", "m" * 20, priority=1, shrink=shrink)
+    tree = budget.add("tree", "t" * 10, priority=0, shrink=shrink)
+
+    assert budget.fit()
+    assert budget.total == 100
+    assert (tree.text, second.text) == ("", "m" * 10)
+    assert len(first.text) == 20 and len(current.text) == 40
+    assert budget.breakdown()[-2:] == [("second", 10, "shrunk from 20"), ("tree", 0, "dropped")]
+
+def test_no_limit_keeps_everything():
+    budget = ContextBudget(0, count_tokens=len)
+    budget.add("tree", "t" * 1000, shrink=lambda text, tokens: "")
+    assert budget.fit()
+    assert budget.total == 1000
+
+def test_estimate_tokens_charges_nothing_for_empty_text():
+    """Test that empty text costs no tokens and any other text at least one."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a") == 1
+    assert estimate_tokens("abcde") == 2